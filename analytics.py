@@ -0,0 +1,224 @@
+"""수집 시점에 미리 계산해 두는 분석 뷰 (폼 추이, 포메이션별/대회별/상대팀별 성적, 선수별 90분당 기록).
+
+폼이나 상대 전적 같은 질문에 원본 행 수십 개를 넣고 LLM이 직접 계산하게 하는 대신, 결과를 표로 만들어
+data/.analytics/<뷰>.csv 에 저장하고 (정형 질의 테이블로도 사용), 행마다 요약 문서를 만들어
+컬렉션에 함께 넣는다 (source="analytics"). 원본 CSV가 바뀌면 ingest.py가 다시 계산한다.
+
+    [view_record_by_opponent] Arsenal | MP: 2; W: 0; D: 2; L: 0; GF: 7; GA: 7; ...
+
+한글 제목은 문서 본문에 넣지 않고 metadata(title)로만 남긴다. 제목의 "경기", "득점" 같은 단어는
+원본 행에는 없어서, 본문에 있으면 키워드/임베딩 검색에서 일반적인 질문에도 분석 문서만 상위에 오른다.
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+import datastore
+from serialize import format_value, is_missing, row_metadata
+
+ANALYTICS_DIR = os.path.join(datastore.DATA_DIR, ".analytics")
+SOURCE = "analytics"
+
+# 뷰 정의나 요약 문서 형식이 바뀌면 올려서 수집 시 다시 반영하게 한다
+ANALYTICS_VERSION = 2
+
+ROLLING_WINDOW = 5
+POINTS = {"W": 3, "D": 1, "L": 0}
+
+# 뷰 이름 → (문서 제목 (metadata), 문서의 라벨로 쓸 열)
+VIEWS = {
+    "view_form_rolling": ("최근 5경기 폼 (이동 평균)", ["Date", "Opponent"]),
+    "view_results_by_opp_formation": ("상대 포메이션별 성적", ["Opp Formation"]),
+    "view_results_by_formation": ("맨시티 포메이션 vs 상대 포메이션 성적", ["Formation", "Opp Formation"]),
+    "view_record_by_comp": ("대회별 성적", ["Comp"]),
+    "view_record_by_opponent": ("상대팀별 전적", ["Opponent"]),
+    "view_player_per90": ("선수별 득점/도움 (90분당)", ["Player"]),
+    "view_player_comp_per90": ("선수별 대회별 득점/도움 (90분당)", ["Player", "Comp"]),
+}
+
+
+# -------------------------------
+# 1) 경기 단위 뷰
+# -------------------------------
+def played_matches():
+    """결과가 있는 경기만, 날짜순. 슈팅/점유 기록을 같은 경기(Date, Opponent)에 붙인다."""
+    fixtures = datastore.load_table("mancity_scores_fixtures")
+    matches = fixtures[fixtures["Result"].notna()].copy()
+    shooting = datastore.load_table("mancity_shooting")[["Date", "Opponent", "Sh", "SoT"]]
+    possession = datastore.load_table("mancity_possession")[["Date", "Opponent", "Touches_Att Pen"]]
+    matches = matches.merge(shooting, on=["Date", "Opponent"], how="left")
+    matches = matches.merge(possession, on=["Date", "Opponent"], how="left")
+    matches["Points"] = matches["Result"].map(POINTS)
+    return matches.sort_values("Date").reset_index(drop=True)
+
+
+def form_rolling(matches, window=ROLLING_WINDOW):
+    columns = ["GF", "GA", "xG", "xGA", "Sh", "SoT", "Poss", "Touches_Att Pen", "Points"]
+    # 경기 수가 window보다 적은 시즌 초반에도 그때까지의 평균을 보여준다
+    rolling = matches[columns].rolling(window, min_periods=1).mean().round(2)
+    view = matches[["Date", "Opponent", "Comp", "Venue", "Result", "GF", "GA", "xG", "xGA"]].copy()
+    for column in columns:
+        view[f"Last{window}_{column}"] = rolling[column]
+    view[f"Last{window}_Form"] = [
+        "".join(matches["Result"].iloc[max(0, i - window + 1):i + 1]) for i in range(len(matches))
+    ]
+    return view
+
+
+def record_by(matches, group_by):
+    """group_by 열별 경기 수, 승/무/패, 득실, 평균 xG/xGA/점유율, 경기당 승점."""
+    grouped = matches.groupby(group_by, dropna=True)
+    view = grouped.agg(
+        MP=("Result", "size"),
+        W=("Result", lambda s: int((s == "W").sum())),
+        D=("Result", lambda s: int((s == "D").sum())),
+        L=("Result", lambda s: int((s == "L").sum())),
+        GF=("GF", "sum"),
+        GA=("GA", "sum"),
+        xG_avg=("xG", "mean"),
+        xGA_avg=("xGA", "mean"),
+        Poss_avg=("Poss", "mean"),
+        PPG=("Points", "mean"),
+    ).reset_index()
+    view["GD"] = view["GF"] - view["GA"]
+    view["Win%"] = view["W"] / view["MP"] * 100
+    return view.sort_values(["MP", "PPG"], ascending=False).round(2).reset_index(drop=True)
+
+
+# -------------------------------
+# 2) 선수 단위 뷰
+# -------------------------------
+def _per90(value, minutes):
+    return (value / minutes * 90).where(minutes > 0).round(2)
+
+
+def player_per90():
+    """시즌 전체 득점/도움/xG의 90분당 값과 골 기록(mancity_goal_logs) 기준 득점/도움 수."""
+    stats = datastore.load_table("Standard Stats")
+    view = pd.DataFrame({
+        "Player": stats["Player"],
+        "Pos": stats["Pos"],
+        "MP": stats["Playing Time_MP"],
+        "Min": stats["Playing Time_Min"],
+        "Gls": stats["Performance_Gls"],
+        "Ast": stats["Performance_Ast"],
+        "G+A": stats["Performance_G+A"],
+        "npG": stats["Performance_G-PK"],
+        "xG": stats["Expected_xG"],
+        "xAG": stats["Expected_xAG"],
+    })
+    view = view[view["Min"] > 0]
+    for column in ["Gls", "Ast", "G+A", "npG", "xG", "xAG"]:
+        view[f"{column}/90"] = _per90(view[column], view["Min"])
+    view["Gls-xG"] = (view["Gls"] - view["xG"]).round(2)
+
+    goals = datastore.load_table("mancity_goal_logs")
+    view["Logged_Gls"] = view["Player"].map(goals["Scorer"].value_counts()).fillna(0).astype(int)
+    view["Logged_Ast"] = view["Player"].map(goals["Assist"].value_counts()).fillna(0).astype(int)
+    return view.sort_values(["G+A", "Min"], ascending=False).reset_index(drop=True)
+
+
+def player_comp_per90():
+    """Player_summary의 대회별 출전/득점/도움을 (선수, 대회) 행으로 펼치고 90분당 값을 붙인다."""
+    summary = datastore.load_table("Player_summary")
+    comps = sorted({column.rsplit("_", 1)[0] for column in summary.columns if column.endswith("_Min")})
+    frames = []
+    for comp in comps:
+        frame = pd.DataFrame({
+            "Player": summary["Player"],
+            "Comp": comp,
+            "MP": summary[f"{comp}_MP"],
+            "Min": summary[f"{comp}_Min"],
+            "Gls": summary[f"{comp}_Gls"],
+            "Ast": summary[f"{comp}_Ast"],
+        })
+        frames.append(frame[frame["Min"] > 0])
+    view = pd.concat(frames, ignore_index=True)
+    view["G+A"] = view["Gls"] + view["Ast"]
+    for column in ["Gls", "Ast", "G+A"]:
+        view[f"{column}/90"] = _per90(view[column], view["Min"])
+    return view.sort_values(["Player", "Min"], ascending=[True, False]).reset_index(drop=True)
+
+
+# -------------------------------
+# 3) 생성, 저장, 요약 문서
+# -------------------------------
+def build_views():
+    matches = played_matches()
+    return {
+        "view_form_rolling": form_rolling(matches),
+        "view_results_by_opp_formation": record_by(matches, ["Opp Formation"]),
+        "view_results_by_formation": record_by(matches, ["Formation", "Opp Formation"]),
+        "view_record_by_comp": record_by(matches, ["Comp"]),
+        "view_record_by_opponent": record_by(matches, ["Opponent"]),
+        "view_player_per90": player_per90(),
+        "view_player_comp_per90": player_comp_per90(),
+    }
+
+
+def _to_csv(frame):
+    return frame.to_csv(index=False, date_format="%Y-%m-%d")
+
+
+def digest(views):
+    """뷰 내용의 해시 (manifest에 기록해 바뀌었을 때만 문서를 다시 반영)."""
+    sha = hashlib.sha256()
+    for name in sorted(views):
+        sha.update(name.encode("utf-8"))
+        sha.update(_to_csv(views[name]).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def save_views(views, directory=ANALYTICS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for name, frame in views.items():
+        tmp_path = os.path.join(directory, f"{name}.csv.tmp")
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(_to_csv(frame))
+        os.replace(tmp_path, os.path.join(directory, f"{name}.csv"))
+
+
+def load_views(directory=ANALYTICS_DIR):
+    """저장된 뷰 {이름: DataFrame}. 아직 수집 전이면 빈 dict."""
+    views = {}
+    for name in VIEWS:
+        path = os.path.join(directory, f"{name}.csv")
+        if os.path.exists(path):
+            frame = pd.read_csv(path)
+            if "Date" in frame.columns:
+                frame["Date"] = pd.to_datetime(frame["Date"])
+            views[name] = frame
+    return views
+
+
+def _document_text(name, row):
+    _, label_columns = VIEWS[name]
+    label = " vs ".join(format_value(row[column]) for column in label_columns if not is_missing(row.get(column)))
+    fields = "; ".join(
+        f"{column}: {format_value(value)}"
+        for column, value in row.items()
+        if column not in label_columns and not is_missing(value)
+    )
+    return f"[{name}] {label} | {fields}"
+
+
+def build_documents(views):
+    """뷰의 각 행을 요약 문서 (텍스트, metadata) 목록으로 만든다. 선수별 대회 기록은 선수 문서에 합친다."""
+    by_player = {}
+    for row in views["view_player_comp_per90"].to_dict("records"):
+        by_player.setdefault(row["Player"], []).append(
+            f"{row['Comp']} Gls {format_value(row['Gls'])}, Ast {format_value(row['Ast'])} "
+            f"(Min {format_value(row['Min'])}, G+A/90 {format_value(row['G+A/90'])})"
+        )
+
+    documents = []
+    for name, frame in views.items():
+        if name == "view_player_comp_per90":
+            continue
+        for row in frame.to_dict("records"):
+            text = _document_text(name, row)
+            if name == "view_player_per90" and row["Player"] in by_player:
+                text += " | By Comp: " + ", ".join(by_player[row["Player"]])
+            documents.append((text, {"view": name, "title": VIEWS[name][0], **row_metadata(row)}))
+    return documents
@@ -0,0 +1,128 @@
+"""의미 기반 답변 캐시.
+
+새 질문의 임베딩이 이전에 답한 질문과 충분히 가까우면 (코사인 유사도 ≥ threshold)
+검색/LLM 단계를 건너뛰고 저장된 답변을 돌려준다. 각 답변은 만들어질 당시의 데이터 버전
+(ingest.data_version + 채팅 모델 + 임베딩 모델/차원 + 표 지정 모드)과 함께 저장되며, 같은 버전의 답변만 찾는다.
+설정이 다른 프로세스(API 서버, Streamlit 앱)가 같은 파일을 함께 써도 서로의 답변을 지우지 않고,
+수집으로 데이터 버전이 바뀌었을 때만 이전 데이터 버전의 답변을 삭제한다.
+
+"2024-08-18 경기 결과"와 "2024-08-24 경기 결과"처럼 날짜나 상대팀만 다른 질문은 임베딩이 매우 가깝기 때문에,
+질문에서 찾은 항목(entities.EntityExtractor.extract: 선수, 상대팀, 대회, 날짜 등)도 함께 저장하고
+항목이 완전히 같은 답변만 돌려준다.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import config
+import ingest
+
+
+def current_version(dimensions):
+    # 임베딩 모델이나 차원이 다르면 저장된 임베딩과 비교할 수 없으므로 버전에 포함한다.
+    # 표 지정 모드는 답변 형식이 다르므로 별도 버전으로 저장
+    mode = ":table" if config.TABLE_SPEC_ENABLED else ""
+    return f"{ingest.data_version()}:{config.CHAT_MODEL}:{config.EMBEDDING_MODEL}/{dimensions}{mode}"
+
+
+def _normalize(vectors):
+    # 크기가 0인 벡터는 그대로 둔다 (모든 질문과의 유사도가 0)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def entity_key(entities):
+    """질문에서 찾은 항목 {필드: 값 집합}을 비교용 문자열로 만든다."""
+    return json.dumps(
+        {field: sorted(values) for field, values in (entities or {}).items() if values},
+        ensure_ascii=False, sort_keys=True
+    )
+
+
+def replay(answer):
+    # 저장된 답변을 단어 단위로 흘려보내 스트리밍과 같은 방식으로 화면에 표시
+    yield from re.findall(r"\S+\s*|\s+", answer)
+
+
+class AnswerCache:
+    def __init__(self, path, threshold):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._loaded = None  # (version, 마지막 id, 질문 id 배열, 정규화된 임베딩 행렬)
+        self.stats = {"hits": 0, "misses": 0}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, question TEXT NOT NULL, embedding BLOB NOT NULL, "
+                "answer TEXT NOT NULL, version TEXT NOT NULL, created_at REAL NOT NULL, entities TEXT)"
+            )
+            if "entities" not in {row[1] for row in conn.execute("PRAGMA table_info(answers)")}:
+                # 항목 열이 없던 파일: 기존 답변은 항목을 알 수 없으므로 (NULL) 다시 쓰이지 않는다
+                conn.execute("ALTER TABLE answers ADD COLUMN entities TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_version ON answers (version)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _matrix(self, conn, version):
+        """현재 버전의 임베딩 행렬을 메모리에 올려두고, 다른 프로세스가 추가한 행만 이어서 읽는다."""
+        if self._loaded is None or self._loaded[0] != version:
+            # 데이터 버전이 바뀌었으면 이전 데이터로 만든 답변은 삭제 (다른 설정의 같은 데이터 버전 답변은 유지)
+            data_version = version.split(":", 1)[0]
+            conn.execute("DELETE FROM answers WHERE version NOT LIKE ?", (f"{data_version}:%",))
+            self._loaded = (version, 0, np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32))
+        _, last_id, ids, matrix = self._loaded
+        rows = conn.execute(
+            "SELECT id, embedding FROM answers WHERE version = ? AND id > ? ORDER BY id", (version, last_id)
+        ).fetchall()
+        if rows:
+            new = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+            new = _normalize(new)
+            matrix = new if matrix.size == 0 else np.vstack([matrix, new])
+            ids = np.concatenate([ids, [row_id for row_id, _ in rows]])
+            self._loaded = (version, rows[-1][0], ids, matrix)
+        return ids, matrix
+
+    def lookup(self, embedding, entities=None):
+        """비슷하고 질문의 항목(entities)이 같은 질문의 답변이 있으면 반환하고, 없으면 None."""
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock, self._connect() as conn:
+            ids, matrix = self._matrix(conn, current_version(len(query)))
+            if matrix.size:
+                scores = matrix @ query
+                candidates = np.flatnonzero(scores >= self.threshold)
+                if candidates.size:
+                    rows = conn.execute(
+                        f"SELECT id, answer FROM answers WHERE entities = ? AND id IN ({','.join('?' * candidates.size)})",
+                        (entity_key(entities), *(int(ids[i]) for i in candidates))
+                    ).fetchall()
+                    if rows:
+                        score = dict(zip(ids[candidates].tolist(), scores[candidates].tolist()))
+                        self.stats["hits"] += 1
+                        return max(rows, key=lambda row: score[row[0]])[1]
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, question, embedding, answer, entities=None):
+        if not answer.strip():
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO answers (question, embedding, answer, version, created_at, entities) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (question, vector.tobytes(), answer, current_version(len(vector)), time.time(), entity_key(entities))
+            )
@@ -0,0 +1,223 @@
+"""화면 없이 채팅 파이프라인을 제공하는 HTTP API 서버 (FastAPI).
+
+chatbot_app.py와 같은 pipeline.ChatTurn(검색 → 생성)을 사용하며, 임베딩 클라이언트/ChromaDB/채팅 모델은
+resources.py의 프로세스 공유 리소스를 모든 요청이 재사용한다. 동시에 처리하는 요청은 API_MAX_ACTIVE개,
+기다릴 수 있는 요청은 API_MAX_QUEUE개까지이며 대기열이 가득 찼거나 API_QUEUE_TIMEOUT초 안에 차례가
+오지 않으면 503(Retry-After)으로 바로 거절한다.
+
+    python api_server.py --port 8000
+
+    POST /chat      {"question": "맨유전 결과", "stream": true}
+                    → text/event-stream (event: token / done / error)
+                    {"question": "...", "stream": false} → {"answer": "...", "trace": {...}}
+    GET  /metrics   수락/거절/대기 수, 대기 시간과 응답 시간 p50/p95
+    GET  /healthz
+
+프로세스 하나가 리소스 풀 하나를 가지므로, 여러 프로세스로 늘릴 때는 포트별로 띄우고 앞단에서 나눈다
+(질문 임베딩/답변 캐시는 디스크 캐시라 프로세스끼리 공유된다).
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import logging
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+
+import config
+import resources
+from pipeline import ChatTurn
+from sweep_retrieval import percentile
+from tracing import append_trace, build_trace
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# 1) 요청 수락 제어 (동시 처리 수 + 대기열)
+# -------------------------------
+class Overloaded(Exception):
+    pass
+
+
+class Admission:
+    def __init__(self, max_active=config.API_MAX_ACTIVE, max_queue=config.API_MAX_QUEUE,
+                 timeout=config.API_QUEUE_TIMEOUT, window=1000):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_active)
+        self.active = 0
+        self.queued = 0
+        self.counts = collections.Counter()
+        # 최근 window개 요청의 대기 시간/처리 시간 (초)
+        self.queue_waits = collections.deque(maxlen=window)
+        self.latencies = collections.deque(maxlen=window)
+
+    async def acquire(self):
+        """처리 차례를 기다린다. 대기열이 가득 찼거나 시간 안에 차례가 오지 않으면 Overloaded."""
+        start = time.perf_counter()
+        if not self._slots.locked():
+            # 빈 자리가 있으면 기다리지 않고 바로 처리 (acquire가 이벤트 루프에 양보하지 않음)
+            await self._slots.acquire()
+        else:
+            if self.queued >= self.max_queue:
+                self.counts["rejected"] += 1
+                raise Overloaded("queue full")
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.counts["timed_out"] += 1
+                raise Overloaded("queue timeout")
+            finally:
+                self.queued -= 1
+        self.queue_waits.append(time.perf_counter() - start)
+        self.active += 1
+        self.counts["admitted"] += 1
+        return time.perf_counter()
+
+    def release(self, started, ok=True):
+        self.active -= 1
+        self._slots.release()
+        self.latencies.append(time.perf_counter() - started)
+        self.counts["completed" if ok else "failed"] += 1
+
+    def metrics(self):
+        def stats(values):
+            if not values:
+                return {"p50_ms": None, "p95_ms": None}
+            return {"p50_ms": percentile(list(values), 50) * 1000, "p95_ms": percentile(list(values), 95) * 1000}
+
+        return {
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            **{key: self.counts[key] for key in ("admitted", "rejected", "timed_out", "completed", "failed")},
+            "queue_wait": stats(self.queue_waits),
+            "latency": stats(self.latencies),
+        }
+
+
+admission = Admission()
+# 외부 호출(임베딩, 정형 질의, 검색, LLM 스트림) 동시 실행 수 (async_pipeline.py와 같은 설정)
+limiter = asyncio.Semaphore(config.UPSTREAM_CONCURRENCY)
+
+
+# -------------------------------
+# 2) 채팅 턴 실행
+# -------------------------------
+async def run_turn(question):
+    """턴을 준비하고 답변 조각을 차례로 내보낸다. 마지막에는 ("done", 추적 기록)을 내보낸다."""
+    start = time.perf_counter()
+    turn = ChatTurn(question)
+    await turn.aprepare(limiter)
+    pieces = []
+    async for piece in turn.astream(limiter):
+        pieces.append(piece)
+        yield piece
+    answer = "".join(pieces)
+    await asyncio.to_thread(turn.finish, answer)
+    trace = build_trace(turn, answer, time.perf_counter() - start)
+    await asyncio.to_thread(append_trace, trace)
+    yield ("done", {"answer": answer, "trace": trace})
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _overloaded(reason):
+    return JSONResponse(
+        {"error": "overloaded", "reason": reason},
+        status_code=503,
+        headers={"Retry-After": str(max(1, round(config.API_QUEUE_TIMEOUT)))}
+    )
+
+
+# -------------------------------
+# 3) HTTP 엔드포인트
+# -------------------------------
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # 첫 요청이 리소스 생성 시간을 떠안지 않도록 시작할 때 공유 리소스를 만들어 둔다
+    await asyncio.to_thread(resources.warm_up)
+    yield
+
+
+app = FastAPI(title="Man City tactical analysis chat API", lifespan=lifespan)
+
+
+class ChatRequest(BaseModel):
+    question: str = Field(min_length=1)
+    stream: bool = True
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    try:
+        started = await admission.acquire()
+    except Overloaded as e:
+        return _overloaded(str(e))
+
+    if not request.stream:
+        ok = False
+        try:
+            async for piece in run_turn(request.question):
+                if isinstance(piece, tuple):
+                    ok = True
+                    return piece[1]
+        finally:
+            admission.release(started, ok)
+
+    outcome = {"ok": False}
+
+    async def events():
+        try:
+            async for piece in run_turn(request.question):
+                if isinstance(piece, tuple):
+                    outcome["ok"] = True
+                    yield _event(*piece)
+                elif piece:
+                    yield _event("token", {"text": piece})
+        except Exception as e:
+            logger.exception("chat turn failed")
+            yield _event("error", {"error": str(e)})
+
+    # 스트림이 끝나거나 클라이언트가 연결을 끊은 뒤 처리 자리를 돌려준다
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(lambda: admission.release(started, outcome["ok"]))
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    return admission.metrics()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="채팅 파이프라인 HTTP API 서버를 실행합니다.")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
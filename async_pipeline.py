@@ -0,0 +1,77 @@
+"""프로세스 전체가 공유하는 asyncio 이벤트 루프에서 채팅 턴을 실행한다.
+
+검색(ainvoke)과 답변 생성(astream)은 백그라운드 스레드 하나에서 도는 이벤트 루프 위에서
+동시에 진행되고, 외부 호출(임베딩, 정형 질의, 검색, LLM 스트림) 수는 asyncio.Semaphore
+(config.UPSTREAM_CONCURRENCY)로 제한한다. 세션 스레드는 큐에서 답변 조각만 받아 화면에 그린다.
+
+    turn = ChatTurn(question)
+    for piece in stream_turn(turn):    # turn.aprepare() + turn.astream()
+        ...
+"""
+import asyncio
+import queue
+import threading
+
+import config
+
+_lock = threading.Lock()
+_state = {}
+
+_DONE = object()
+
+
+def get_loop():
+    """백그라운드 스레드에서 실행 중인 공유 이벤트 루프."""
+    with _lock:
+        if "loop" not in _state:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="chat-event-loop", daemon=True).start()
+            _state["loop"] = loop
+            _state["limiter"] = asyncio.Semaphore(config.UPSTREAM_CONCURRENCY)
+        return _state["loop"]
+
+
+def get_limiter():
+    get_loop()
+    return _state["limiter"]
+
+
+def submit(coroutine):
+    """공유 루프에서 코루틴을 실행하고 concurrent.futures.Future를 반환한다."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+
+
+async def _produce(turn, pieces):
+    try:
+        await turn.aprepare(get_limiter())
+        async for piece in turn.astream(get_limiter()):
+            pieces.put(piece)
+    except Exception as e:
+        pieces.put(e)
+    finally:
+        pieces.put(_DONE)
+
+
+def stream_turn(turn):
+    """turn을 공유 루프에서 준비/생성하고, 답변 조각을 호출한 스레드로 하나씩 넘겨준다."""
+    pieces = queue.Queue()
+    future = submit(_produce(turn, pieces))
+    try:
+        while True:
+            item = pieces.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 화면 쪽에서 중단되면 (새 질문으로 rerun 등) 루프의 작업도 취소
+        future.cancel()
+
+
+def answer_pieces(turn):
+    """설정(config.ASYNC_PIPELINE)에 따라 공유 루프 또는 현재 스레드에서 턴을 실행한다."""
+    if config.ASYNC_PIPELINE:
+        yield from stream_turn(turn)
+    else:
+        yield from turn.prepare().stream()
@@ -0,0 +1,180 @@
+"""채팅 턴 전체 지연 시간 벤치마크 (단계별 p50/p95/p99, 동시 실행 수별 처리량).
+
+chatbot_app.py와 같은 pipeline.ChatTurn을 화면 없이 실행한다. 기본값은 로컬 백엔드(providers.py)라
+네트워크 없이 측정되며, 로컬 색인이 비어 있으면 먼저 수집을 실행한다.
+
+    python bench_latency.py
+    python bench_latency.py --concurrency 1 4 16 --rounds 2 --output before.json
+    python bench_latency.py --compare before.json      # 이전 결과와 p50/p95 비교
+    python bench_latency.py --openai                   # 실제 OpenAI 백엔드로 측정
+    python bench_latency.py --sync                     # asyncio 파이프라인 없이 측정
+
+단계: route, embedding, answer_cache, structured_query, retrieval, context_pack, format_messages,
+first_token(스트림 시작 → 첫 조각), stream(스트림 전체, 화면 갱신 포함), ui_update(화면 갱신), total
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 설정 모듈을 읽기 전에 백엔드를 정한다
+if "--openai" not in sys.argv:
+    os.environ.setdefault("MANCITY_EMBEDDING_PROVIDER", "local")
+    os.environ.setdefault("MANCITY_CHAT_PROVIDER", "local")
+if "--sync" in sys.argv:
+    os.environ["MANCITY_ASYNC_PIPELINE"] = "0"
+if "--answer-cache" not in sys.argv:
+    os.environ["MANCITY_ANSWER_CACHE_ENABLED"] = "0"
+os.environ.setdefault("MANCITY_WARMUP_QUERY", "")
+
+import config  # noqa: E402
+import ingest  # noqa: E402
+import resources  # noqa: E402
+from async_pipeline import answer_pieces  # noqa: E402
+from pipeline import ChatTurn  # noqa: E402
+from streaming import ThrottledRenderer  # noqa: E402
+from sweep_retrieval import GOLDEN_PATH, load_golden, percentile  # noqa: E402
+
+RESULTS_DIR = "./bench/results"
+
+
+class RecordingPlaceholder:
+    """st.empty() 대신 사용. Streamlit처럼 갱신할 때마다 전체 텍스트를 직렬화한다."""
+
+    def __init__(self):
+        self.updates = 0
+        self.bytes_sent = 0
+
+    def markdown(self, text):
+        self.updates += 1
+        self.bytes_sent += len(json.dumps({"markdown": text}, ensure_ascii=False).encode("utf-8"))
+
+
+def run_turn(question):
+    start = time.perf_counter()
+    turn = ChatTurn(question)
+    placeholder = RecordingPlaceholder()
+    renderer = ThrottledRenderer(placeholder)
+    for piece in answer_pieces(turn):
+        with turn.timed("ui_update"):
+            renderer.write(piece)
+    with turn.timed("ui_update"):
+        full_answer = renderer.close()
+    turn.finish(full_answer)
+    turn.timings["total"] = time.perf_counter() - start
+    return {"timings": turn.timings, "ui_updates": placeholder.updates, "ui_bytes": placeholder.bytes_sent}
+
+
+def summarize(values):
+    return {
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "mean_ms": sum(values) / len(values) * 1000,
+    }
+
+
+def run_level(questions, concurrency, rounds):
+    work = [item["question"] for item in questions] * rounds
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        turns = list(pool.map(run_turn, work))
+    wall = time.perf_counter() - start
+
+    stages = {}
+    for turn in turns:
+        for stage, seconds in turn["timings"].items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "concurrency": concurrency,
+        "turns": len(turns),
+        "wall_seconds": wall,
+        "throughput_turns_per_s": len(turns) / wall,
+        "ui_updates_per_turn": sum(t["ui_updates"] for t in turns) / len(turns),
+        "ui_bytes_per_turn": sum(t["ui_bytes"] for t in turns) / len(turns),
+        "stages": {stage: summarize(values) for stage, values in stages.items()},
+    }
+
+
+def print_level(level):
+    print(
+        f"\n▶ concurrency={level['concurrency']}  turns={level['turns']}  "
+        f"throughput={level['throughput_turns_per_s']:.2f} turns/s  "
+        f"ui_updates/turn={level['ui_updates_per_turn']:.0f}  ui_bytes/turn={level['ui_bytes_per_turn']:.0f}"
+    )
+    for stage, stats in level["stages"].items():
+        print(f"  {stage:<17} p50={stats['p50_ms']:9.1f}ms  p95={stats['p95_ms']:9.1f}ms  p99={stats['p99_ms']:9.1f}ms")
+
+
+def compare(previous, current):
+    """같은 동시 실행 수끼리 단계별 p50/p95 변화를 출력한다."""
+    before = {level["concurrency"]: level for level in previous["levels"]}
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"\n▶ concurrency={level['concurrency']} (이전 → 현재)")
+        print(f"  throughput        {old['throughput_turns_per_s']:.2f} → {level['throughput_turns_per_s']:.2f} turns/s")
+        for stage, stats in level["stages"].items():
+            if stage in old["stages"]:
+                o = old["stages"][stage]
+                print(
+                    f"  {stage:<17} p50 {o['p50_ms']:.1f} → {stats['p50_ms']:.1f}ms  "
+                    f"p95 {o['p95_ms']:.1f} → {stats['p95_ms']:.1f}ms"
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="채팅 턴 단계별 지연 시간과 처리량을 측정합니다.")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="질문 세트 (JSONL)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rounds", type=int, default=1, help="질문 세트 반복 횟수")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: bench/results/latency_<시각>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--openai", action="store_true", help="OpenAI 백엔드로 측정")
+    parser.add_argument("--answer-cache", action="store_true", help="답변 캐시를 켠 채로 측정")
+    parser.add_argument("--sync", action="store_true", help="asyncio 파이프라인 대신 스레드에서 직접 실행")
+    args = parser.parse_args(argv)
+
+    if not resources.get_vectorstore().get(limit=1, include=[])["ids"]:
+        print("색인이 비어 있어 먼저 수집합니다...")
+        ingest.run()
+    print(f"warm-up: {resources.warm_up()['total'] * 1000:.0f}ms")
+
+    questions = load_golden(args.golden)
+    result = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "embedding_provider": config.EMBEDDING_PROVIDER,
+            "chat_provider": config.CHAT_PROVIDER,
+            "async_pipeline": config.ASYNC_PIPELINE,
+            "retriever_k": config.RETRIEVER_K,
+            "retriever_fetch_k": config.RETRIEVER_FETCH_K,
+            "context_token_budget": config.CONTEXT_TOKEN_BUDGET,
+            "stream_flush_interval_ms": config.STREAM_FLUSH_INTERVAL_MS,
+            "stream_flush_chars": config.STREAM_FLUSH_CHARS,
+            "questions": len(questions),
+            "rounds": args.rounds,
+        },
+        "levels": [],
+    }
+    for concurrency in args.concurrency:
+        level = run_level(questions, concurrency, args.rounds)
+        print_level(level)
+        result["levels"].append(level)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"latency_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 결과 저장: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+
+
+def _flag(name, default):
+    # 켜고 끄는 설정: 0/false/no/off(대소문자 무관)면 끔, 그 밖의 값은 켬, 없으면 default
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+# -------------------------------
+# 공통 설정 (환경 변수로 덮어쓰기 가능)
+# -------------------------------
+# 임베딩/채팅 백엔드: openai 또는 local (네트워크 없이 실행/벤치마크용, providers.py)
+EMBEDDING_PROVIDER = os.environ.get("MANCITY_EMBEDDING_PROVIDER", "openai")
+CHAT_PROVIDER = os.environ.get("MANCITY_CHAT_PROVIDER", "openai")
+
+# 로컬 임베딩은 벡터 차원이 다르므로 별도 디렉터리에 저장한다
+PERSIST_DIRECTORY = os.environ.get(
+    "MANCITY_PERSIST_DIRECTORY", "./chroma_db_10" if EMBEDDING_PROVIDER == "openai" else "./chroma_db_local"
+)
+
+EMBEDDING_MODEL = os.environ.get(
+    "MANCITY_EMBEDDING_MODEL", "text-embedding-3-large" if EMBEDDING_PROVIDER == "openai" else "local-hashing"
+)
+CHAT_MODEL = os.environ.get("MANCITY_CHAT_MODEL", "gpt-4o-mini" if CHAT_PROVIDER == "openai" else "local-canned")
+CHAT_TEMPERATURE = float(os.environ.get("MANCITY_CHAT_TEMPERATURE", "0"))
+
+# 로컬 백엔드: 해시 임베딩 차원, 응답 토큰 수, 첫 토큰까지 지연(초), 초당 토큰 수 (0이면 지연 없음)
+LOCAL_EMBEDDING_DIMENSIONS = int(os.environ.get("MANCITY_LOCAL_EMBEDDING_DIMENSIONS", "512"))
+LOCAL_CHAT_RESPONSE_TOKENS = int(os.environ.get("MANCITY_LOCAL_CHAT_RESPONSE_TOKENS", "200"))
+LOCAL_CHAT_FIRST_TOKEN_SECONDS = float(os.environ.get("MANCITY_LOCAL_CHAT_FIRST_TOKEN_SECONDS", "0.3"))
+LOCAL_CHAT_TOKENS_PER_SECOND = float(os.environ.get("MANCITY_LOCAL_CHAT_TOKENS_PER_SECOND", "50"))
+
+# MMR Retriever: 최종 문서 수 k, MMR로 다시 고를 후보 수 fetch_k (k보다 커야 다양성이 생긴다),
+# lambda_mult (1에 가까울수록 관련도, 0에 가까울수록 다양성). sweep_retrieval.py로 값을 정한다
+RETRIEVER_K = int(os.environ.get("MANCITY_RETRIEVER_K", "30"))
+RETRIEVER_FETCH_K = int(os.environ.get("MANCITY_RETRIEVER_FETCH_K", "100"))
+RETRIEVER_LAMBDA_MULT = float(os.environ.get("MANCITY_RETRIEVER_LAMBDA_MULT", "0.8"))
+
+# 벡터 검색 백엔드: chroma (기본) 또는 quantized (차원 축소 + float16/int8, 상위 후보만 원본으로 재채점)
+VECTOR_BACKEND = os.environ.get("MANCITY_VECTOR_BACKEND", "chroma")
+QUANTIZED_RESCORE = int(os.environ.get("MANCITY_QUANTIZED_RESCORE", "100"))
+
+# 질문의 선수/상대팀/대회/날짜로 metadata 필터를 만들어 검색 후보를 좁힐지 여부
+ENTITY_FILTER_ENABLED = _flag("MANCITY_ENTITY_FILTER_ENABLED", True)
+
+# 키워드(BM25) 색인과 벡터 검색 결합: 키워드 후보 수, RRF 상수,
+# 질문의 희귀 단어로 볼 최대 문서 비율 (이 단어들이 모두 일치하는 행이 k개 이하이면 벡터 검색 생략)
+HYBRID_ENABLED = _flag("MANCITY_HYBRID_ENABLED", True)
+HYBRID_KEYWORD_K = int(os.environ.get("MANCITY_HYBRID_KEYWORD_K", "30"))
+HYBRID_RRF_K = int(os.environ.get("MANCITY_HYBRID_RRF_K", "60"))
+HYBRID_EXACT_MAX_DF = float(os.environ.get("MANCITY_HYBRID_EXACT_MAX_DF", "0.05"))
+
+# 프로세스 시작 시 워밍업 검색에 사용할 질의 (빈 문자열이면 네트워크 워밍업 생략)
+WARMUP_QUERY = os.environ.get("MANCITY_WARMUP_QUERY", "맨체스터 시티")
+
+# 수집(ingestion) 임베딩 단계: 배치당 토큰/문서 수 상한, 동시 요청 수, 재시도 횟수
+INGEST_BATCH_TOKENS = int(os.environ.get("MANCITY_INGEST_BATCH_TOKENS", "20000"))
+INGEST_BATCH_SIZE = int(os.environ.get("MANCITY_INGEST_BATCH_SIZE", "256"))
+INGEST_MAX_WORKERS = int(os.environ.get("MANCITY_INGEST_MAX_WORKERS", "4"))
+INGEST_MAX_RETRIES = int(os.environ.get("MANCITY_INGEST_MAX_RETRIES", "6"))
+
+# 질문 임베딩 캐시: 메모리 LRU 항목 수, 워커 프로세스가 공유하는 디스크 캐시 경로
+QUERY_CACHE_SIZE = int(os.environ.get("MANCITY_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_PATH = os.environ.get("MANCITY_QUERY_CACHE_PATH", "./.cache/query_embeddings.sqlite")
+
+# 의미 기반 답변 캐시: 이전 질문과의 코사인 유사도가 이 값 이상이면 저장된 답변을 그대로 사용
+ANSWER_CACHE_ENABLED = _flag("MANCITY_ANSWER_CACHE_ENABLED", True)
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("MANCITY_ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_PATH = os.environ.get("MANCITY_ANSWER_CACHE_PATH", "./.cache/answers.sqlite")
+
+# 프롬프트에 넣을 범례(용어 설명)의 최대 토큰 수
+LEGEND_TOKEN_BUDGET = int(os.environ.get("MANCITY_LEGEND_TOKEN_BUDGET", "600"))
+
+# 검색 문맥 조립: 문맥 최대 토큰 수, 거의 같은 행으로 볼 유사도(Jaccard)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("MANCITY_CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_NEAR_DUPLICATE = float(os.environ.get("MANCITY_CONTEXT_NEAR_DUPLICATE", "0.9"))
+
+# 채팅 턴 추적: JSON Lines 로그 경로 (빈 문자열이면 기록 안 함), 사이드바 패널 기본 표시 여부
+TRACE_LOG_PATH = os.environ.get("MANCITY_TRACE_LOG_PATH", "./logs/chat_traces.jsonl")
+TRACE_PANEL = _flag("MANCITY_TRACE_PANEL", False)
+
+# 스트리밍 화면 갱신 주기: 마지막 갱신 후 이 시간(ms)이 지났거나 쌓인 글자 수가 이 값을 넘으면 갱신
+STREAM_FLUSH_INTERVAL_MS = int(os.environ.get("MANCITY_STREAM_FLUSH_INTERVAL_MS", "50"))
+STREAM_FLUSH_CHARS = int(os.environ.get("MANCITY_STREAM_FLUSH_CHARS", "400"))
+
+# asyncio 파이프라인: 공유 이벤트 루프에서 턴을 실행할지 여부, 동시에 진행할 외부 호출(임베딩/검색/LLM) 수
+ASYNC_PIPELINE = _flag("MANCITY_ASYNC_PIPELINE", True)
+UPSTREAM_CONCURRENCY = int(os.environ.get("MANCITY_UPSTREAM_CONCURRENCY", "16"))
+
+# HTTP 채팅 API (api_server.py): 주소/포트, 동시에 처리할 요청 수, 대기열 길이, 대기열 최대 대기 시간(초)
+API_HOST = os.environ.get("MANCITY_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("MANCITY_API_PORT", "8000"))
+API_MAX_ACTIVE = int(os.environ.get("MANCITY_API_MAX_ACTIVE", "8"))
+API_MAX_QUEUE = int(os.environ.get("MANCITY_API_MAX_QUEUE", "32"))
+API_QUEUE_TIMEOUT = float(os.environ.get("MANCITY_API_QUEUE_TIMEOUT", "10"))
+
+# 대화 기억: 프롬프트에 그대로 넣을 최근 대화의 최대 토큰 수, 그보다 오래된 대화를 줄인 요약의 최대 토큰 수
+MEMORY_WINDOW_TOKENS = int(os.environ.get("MANCITY_MEMORY_WINDOW_TOKENS", "1500"))
+MEMORY_SUMMARY_TOKENS = int(os.environ.get("MANCITY_MEMORY_SUMMARY_TOKENS", "300"))
+
+# 대화 기록 저장소 (SQLite) 경로, 화면에 처음 그리고 "이전 메시지 더 보기"마다 더 읽을 메시지 수
+HISTORY_DB_PATH = os.environ.get("MANCITY_HISTORY_DB_PATH", "./.cache/chat_history.sqlite")
+HISTORY_PAGE_SIZE = int(os.environ.get("MANCITY_HISTORY_PAGE_SIZE", "20"))
+
+# 수집 시 분석 뷰(폼, 상대 전적, 포메이션별 성적, 선수별 90분당 기록)를 계산해 테이블/요약 문서로 넣을지 여부
+ANALYTICS_ENABLED = _flag("MANCITY_ANALYTICS_ENABLED", True)
+
+# 질문 경로 분류기 (router.py): 범례/인사/되묻기는 LLM 없이 답하고, 일반 질문은 정형 질의 LLM을 건너뛴다
+ROUTER_ENABLED = _flag("MANCITY_ROUTER_ENABLED", True)
+
+# 표 지정 모드 (table_spec.py): 모델은 첫 줄에 표 질의(JSON)만 쓰고 해석을 스트리밍, 표는 앱이 데이터에서 직접 그림.
+# 한 표의 최대 행 수
+TABLE_SPEC_ENABLED = _flag("MANCITY_TABLE_SPEC_ENABLED", False)
+TABLE_SPEC_MAX_ROWS = int(os.environ.get("MANCITY_TABLE_SPEC_MAX_ROWS", "30"))
@@ -0,0 +1,82 @@
+"""검색된 문서를 프롬프트 문맥으로 조립한다.
+
+1) 같은 source/row_index 조각은 하나로 합치고 (겹치는 부분 제거)
+2) 완전히 같거나 거의 같은 행은 한 번만 남기고
+   (예: Player_summary.csv 와 Goalkeeper_summary.csv 는 같은 파일이다)
+3) 검색 순위(관련도) 순서대로
+4) 토큰 예산이 찰 때까지 채운다.
+"""
+import re
+
+import config
+from tokens import count_tokens
+
+_TABLE_PREFIX = re.compile(r"^\[[^\]]*\]\s*")
+
+
+def _merge_text(a, b, max_overlap=200):
+    # a의 끝과 b의 앞이 겹치면 겹친 부분을 한 번만 남긴다
+    if b in a:
+        return a
+    for size in range(min(len(a), len(b), max_overlap), 0, -1):
+        if a.endswith(b[:size]):
+            return a + b[size:]
+    return a + b
+
+
+def merge_fragments(docs):
+    """같은 행에서 나온 조각을 합쳐 (본문, metadata) 목록을 관련도 순서대로 반환한다."""
+    rows = {}
+    for rank, doc in enumerate(docs):
+        metadata = doc.metadata or {}
+        key = (metadata.get("source"), metadata.get("row_index"))
+        if key == (None, None):
+            key = ("", rank)
+        if key in rows:
+            rows[key]["text"] = _merge_text(rows[key]["text"], doc.page_content)
+        else:
+            rows[key] = {"rank": rank, "text": doc.page_content, "metadata": metadata}
+    return sorted(rows.values(), key=lambda row: row["rank"])
+
+
+def _dedupe_key(text):
+    return re.sub(r"\s+", " ", _TABLE_PREFIX.sub("", text)).strip()
+
+
+def _features(text):
+    # 직렬화된 행은 "열: 값" 단위, 그 외에는 단어 단위로 비교
+    body = _dedupe_key(text)
+    parts = re.split(r"\s*[;|]\s*", body)
+    return set(parts) if len(parts) > 2 else set(body.split())
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def pack_context(docs, budget_tokens=config.CONTEXT_TOKEN_BUDGET,
+                 near_duplicate=config.CONTEXT_NEAR_DUPLICATE, model=config.CHAT_MODEL):
+    """(문맥 텍스트, 통계)를 반환한다."""
+    rows = merge_fragments(docs)
+    stats = {"documents": len(docs), "rows": len(rows), "duplicates": 0, "dropped": 0, "kept": 0, "tokens": 0}
+
+    seen_keys = set()
+    kept_features = []
+    parts = []
+    for row in rows:
+        key = _dedupe_key(row["text"])
+        features = _features(row["text"])
+        if key in seen_keys or any(_jaccard(features, other) >= near_duplicate for other in kept_features):
+            stats["duplicates"] += 1
+            continue
+
+        cost = count_tokens(row["text"], model)
+        if stats["tokens"] + cost > budget_tokens:
+            stats["dropped"] += 1
+            continue
+        seen_keys.add(key)
+        kept_features.append(features)
+        parts.append(row["text"])
+        stats["tokens"] += cost
+        stats["kept"] += 1
+    return "\n\n".join(parts), stats
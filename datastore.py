@@ -0,0 +1,228 @@
+"""data/*.csv 를 정리된 열(column) 단위 테이블로 읽어오는 저장소.
+
+CSV 원본의 문제를 한 번만 정리해서 data/.store/<테이블>/ 아래에 타입별 .npy 파일로 저장하고,
+이후에는 memory-map으로 바로 읽는다 (원본 CSV가 바뀌면 자동으로 다시 만든다).
+
+- 결측값 문자열 "null" / 빈 칸 → NaN(숫자) 또는 None(문자열)
+- 천 단위 구분 기호 ("2,250", "78,146") → 숫자
+- 승부차기 점수 "1 (7)" → GF=1, GF_Shootout=7
+- UTF-8 BOM 제거, 이름 없는 빈 열 제거, 줄바꿈 없는 공백(\xa0) → 일반 공백
+- 중복 열 이름 (mancity_passing.csv의 Cmp/Att/Cmp% 등) → Total_Cmp, Short_Cmp ... 로 구분
+- 엑셀이 날짜로 바꿔버린 헤더 "01월 03일" → "1/3"
+"""
+import csv
+import glob
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = "./data"
+STORE_DIR = os.path.join(DATA_DIR, ".store")
+
+# 저장 형식/정규화 규칙이 바뀌면 올려서 저장소를 다시 만든다
+STORE_VERSION = 2
+
+MISSING_VALUES = {"", "null", "nan", "none", "-"}
+
+HEADER_FIXES = {
+    "01월 03일": "1/3",
+}
+
+# 같은 이름이 여러 번 나오거나 원본 표에서 그룹 머리글 아래에 있던 열:
+# 등장 순서대로 붙일 접두어 (None이면 원래 이름 유지)
+DUPLICATE_PREFIXES = {
+    "mancity_passing": {
+        "Cmp": ["Total", "Short", "Medium", "Long"],
+        "Att": ["Total", "Short", "Medium", "Long"],
+        "Cmp%": ["Total", "Short", "Medium", "Long"],
+    },
+    "mancity_goalkeeping": {
+        "GA": [None, "Performance"],
+        "Cmp": ["Launched"],
+        "Att": ["Launched", "Goal Kicks"],
+        "Cmp%": ["Launched"],
+        "Att (GK)": ["Passes"],
+        "Thr": ["Passes"],
+        "Launch%": ["Passes", "Goal Kicks"],
+        "AvgLen": ["Passes", "Goal Kicks"],
+        "Opp": ["Crosses"],
+        "Stp": ["Crosses"],
+        "Stp%": ["Crosses"],
+        "#OPA": ["Sweeper"],
+        "AvgDist": ["Sweeper"],
+    },
+}
+
+NUMBER_RE = re.compile(r"^[+-]?(\d{1,3}(,\d{3})+|\d+)?(\.\d+)?$")
+SCORE_RE = re.compile(r"^(\d+)\s*\((\d+)\)$")
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def table_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def csv_path(name):
+    return os.path.join(DATA_DIR, f"{name}.csv")
+
+
+def list_tables():
+    return sorted(table_name(path) for path in glob.glob(os.path.join(DATA_DIR, "*.csv")))
+
+
+# -------------------------------
+# 1) CSV 정규화
+# -------------------------------
+def _clean_header(table, header):
+    counts = {}
+    prefixes = DUPLICATE_PREFIXES.get(table, {})
+    names = []
+    for raw in header:
+        name = HEADER_FIXES.get(raw.strip(), raw.strip())
+        seen = counts.get(name, 0)
+        counts[name] = seen + 1
+        if name in prefixes and seen < len(prefixes[name]):
+            prefix = prefixes[name][seen]
+            names.append(f"{prefix}_{name}" if prefix else name)
+        elif seen:
+            names.append(f"{name}_{seen + 1}")
+        else:
+            names.append(name)
+    return names
+
+
+def _is_missing(value):
+    return value.strip().lower() in MISSING_VALUES
+
+
+def _to_number(value):
+    return float(value.replace(",", ""))
+
+
+def _convert_column(values):
+    """문자열 값 목록을 {열 이름 접미어: numpy 배열}로 변환한다 ("" 는 원래 열)."""
+    present = [v.strip() for v in values if not _is_missing(v)]
+
+    if present and all(DATE_RE.match(v) for v in present):
+        return {"": np.array([None if _is_missing(v) else v.strip() for v in values], dtype="datetime64[D]")}
+
+    if present and all(NUMBER_RE.match(v) and v not in "+-." for v in present):
+        return {"": np.array([np.nan if _is_missing(v) else _to_number(v) for v in values], dtype=np.float64)}
+
+    if present and all(NUMBER_RE.match(v) or SCORE_RE.match(v) for v in present) \
+            and any(SCORE_RE.match(v) for v in present):
+        scores, shootouts = [], []
+        for v in values:
+            match = None if _is_missing(v) else SCORE_RE.match(v.strip())
+            if match:
+                scores.append(float(match.group(1)))
+                shootouts.append(float(match.group(2)))
+            else:
+                scores.append(np.nan if _is_missing(v) else _to_number(v))
+                shootouts.append(np.nan)
+        return {"": np.array(scores), "_Shootout": np.array(shootouts)}
+
+    return {"": np.array(["" if _is_missing(v) else v.strip().replace("\xa0", " ") for v in values], dtype=np.str_)}
+
+
+def parse_csv(path):
+    """CSV를 읽어 정리된 {열 이름: numpy 배열}을 반환한다."""
+    table = table_name(path)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    header = _clean_header(table, rows[0])
+    body = [row + [""] * (len(header) - len(row)) for row in rows[1:] if any(cell.strip() for cell in row)]
+
+    columns = {}
+    for i, name in enumerate(header):
+        values = [row[i] for row in body]
+        # 줄 끝 쉼표로 생긴 이름 없는 빈 열은 버린다
+        if not name and all(_is_missing(v) for v in values):
+            continue
+        for suffix, array in _convert_column(values).items():
+            columns[f"{name or f'Unnamed_{i}'}{suffix}"] = array
+    return columns
+
+
+# -------------------------------
+# 2) 열 단위 바이너리 저장/로드
+# -------------------------------
+def _source_signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": STORE_VERSION}
+
+
+def _read_meta(name):
+    meta_path = os.path.join(STORE_DIR, name, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# 열을 종류별로 묶어 테이블당 파일 몇 개(2차원 배열, 열 우선 순서)로 저장한다
+BLOCKS = {"f": "float.npy", "M": "date.npy", "U": "str.npy"}
+
+
+def build_table(name):
+    """CSV를 정규화해서 저장소에 기록하고 메타데이터를 반환한다."""
+    path = csv_path(name)
+    columns = parse_csv(path)
+
+    target = os.path.join(STORE_DIR, name)
+    tmp_dir = target + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    meta = {"source": _source_signature(path), "columns": []}
+    blocks = {kind: [] for kind in BLOCKS}
+    for column, array in columns.items():
+        kind = array.dtype.kind
+        meta["columns"].append({"name": column, "block": kind, "index": len(blocks[kind])})
+        blocks[kind].append(array)
+    for kind, arrays in blocks.items():
+        if arrays:
+            np.save(os.path.join(tmp_dir, BLOCKS[kind]), np.asfortranarray(np.column_stack(arrays)))
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    return meta
+
+
+_cache = {}
+
+
+def load_table(name):
+    """테이블을 pandas DataFrame으로 반환한다. 숫자 열은 memory-map된 배열을 그대로 쓴다."""
+    signature = _source_signature(csv_path(name))
+    cached = _cache.get(name)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    meta = _read_meta(name)
+    if meta is None or meta["source"] != signature:
+        meta = build_table(name)
+
+    blocks = {
+        kind: np.load(os.path.join(STORE_DIR, name, file), mmap_mode="r")
+        for kind, file in BLOCKS.items()
+        if any(column["block"] == kind for column in meta["columns"])
+    }
+    data = {}
+    for column in meta["columns"]:
+        values = blocks[column["block"]][:, column["index"]]
+        if column["block"] == "U":
+            values = pd.Series([v or None for v in values.tolist()], dtype=object)
+        data[column["name"]] = values
+    frame = pd.DataFrame(data, copy=False)
+    _cache[name] = (signature, frame)
+    return frame
+
+
+def load_all():
+    return {name: load_table(name) for name in list_tables()}
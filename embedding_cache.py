@@ -0,0 +1,117 @@
+"""질문(query) 임베딩 캐시.
+
+같은 질문을 다시 임베딩하지 않도록 정규화된 질문 텍스트 + 임베딩 모델 이름을 키로
+1) 프로세스 메모리의 LRU 캐시, 2) 모든 워커 프로세스가 공유하는 SQLite 파일 캐시를 차례로 확인한다.
+문서 임베딩(embed_documents)은 캐시하지 않고 그대로 전달한다.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text):
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(model_name, text):
+    return hashlib.sha256(f"{model_name}\x00{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """여러 프로세스가 함께 쓰는 SQLite 기반 캐시 (WAL 모드)."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+        return array("f", row[0]).tolist() if row else None
+
+    def put(self, key, vector):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                (key, array("f", vector).tobytes())
+            )
+
+
+class CachedQueryEmbeddings(Embeddings):
+    def __init__(self, embeddings, model_name, path, max_entries=1024):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk = DiskTier(path)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _cached(self, key):
+        """메모리 LRU → 디스크 순서로 찾은 벡터 (없으면 None)."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return vector
+
+        vector = self.disk.get(key)
+        if vector is not None:
+            self.stats["disk_hits"] += 1
+            self._remember(key, vector)
+        return vector
+
+    def _store(self, key, vector):
+        self.stats["misses"] += 1
+        self.disk.put(key, vector)
+        self._remember(key, vector)
+        return vector
+
+    def embed_query(self, text):
+        key = cache_key(self.model_name, text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self._store(key, self.embeddings.embed_query(text))
+        return vector
+
+    async def aembed_query(self, text):
+        # 캐시에 없을 때만 원래 임베딩의 비동기 클라이언트로 요청한다 (스레드를 잡지 않음)
+        key = cache_key(self.model_name, text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self._store(key, await self.embeddings.aembed_query(text))
+        return vector
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def hit_rate(self):
+        total = sum(self.stats.values())
+        return (self.stats["memory_hits"] + self.stats["disk_hits"]) / total if total else 0.0
@@ -0,0 +1,211 @@
+"""질문에서 선수/상대팀/대회/날짜를 찾아 검색 전 metadata 필터(Chroma where)로 바꾼다.
+
+사전은 datastore 테이블의 실제 값(선수 이름, 상대팀, 대회, 경기 날짜)과 자주 쓰는 한글 별칭으로
+만들며, 질문은 단어 단위 사전 일치만으로 처리하므로 LLM 호출 없이 1ms 안쪽에 끝난다.
+
+    "맨유전 홀란드 슈팅" → {"$or": [{"Opponent": {"$in": ["Manchester Utd"]}},
+                                   {"Player": {"$in": ["Erling Haaland"]}}]}
+
+경기 필드(Date/Opponent/Comp/Venue)끼리, 선수 필드(Player/Pos)끼리는 AND로 묶고,
+두 묶음은 OR로 합친다 (경기 테이블에는 Player가 없고 선수 테이블에는 Opponent가 없기 때문).
+"""
+import re
+from collections import defaultdict
+from typing import Any, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from keyword_index import tokenize
+from mmr import mmr_search
+from serialize import format_value, is_missing
+
+MATCH_FIELDS = ("Date", "Opponent", "Comp", "Venue")
+PLAYER_FIELDS = ("Player", "Pos")
+
+# 한글 별칭 → (필드, 데이터에 있는 값)
+ALIASES = {
+    # 선수
+    "홀란드": ("Player", "Erling Haaland"), "홀란": ("Player", "Erling Haaland"),
+    "포든": ("Player", "Phil Foden"), "더브라위너": ("Player", "Kevin De Bruyne"),
+    "데브라이네": ("Player", "Kevin De Bruyne"), "로드리": ("Player", "Rodri"),
+    "베르나르두": ("Player", "Bernardo Silva"), "그릴리시": ("Player", "Jack Grealish"),
+    "도쿠": ("Player", "Jeremy Doku"), "그바르디올": ("Player", "Joško Gvardiol"),
+    "디아스": ("Player", "Rúben Dias"), "아칸지": ("Player", "Manuel Akanji"),
+    "스톤스": ("Player", "John Stones"), "워커": ("Player", "Kyle Walker"),
+    "에데르송": ("Player", "Ederson"), "오르테가": ("Player", "Stefan Ortega"),
+    "코바치치": ("Player", "Mateo Kovačić"), "귄도안": ("Player", "İlkay Gündoğan"),
+    "마르무시": ("Player", "Omar Marmoush"), "사비우": ("Player", "Sávio"),
+    "누네스": ("Player", "Matheus Nunes"), "리코루이스": ("Player", "Rico Lewis"),
+    "아케": ("Player", "Nathan Aké"), "후사노프": ("Player", "Abdukodir Khusanov"),
+    "보브": ("Player", "Oscar Bobb"), "맥아티": ("Player", "James McAtee"),
+    # 상대팀
+    "맨유": ("Opponent", "Manchester Utd"), "맨체스터유나이티드": ("Opponent", "Manchester Utd"),
+    "첼시": ("Opponent", "Chelsea"), "아스널": ("Opponent", "Arsenal"), "리버풀": ("Opponent", "Liverpool"),
+    "토트넘": ("Opponent", "Tottenham"), "뉴캐슬": ("Opponent", "Newcastle Utd"),
+    "애스턴빌라": ("Opponent", "Aston Villa"), "빌라": ("Opponent", "Aston Villa"),
+    "브라이튼": ("Opponent", "Brighton"), "브렌트포드": ("Opponent", "Brentford"),
+    "풀럼": ("Opponent", "Fulham"), "울버햄튼": ("Opponent", "Wolves"), "울브스": ("Opponent", "Wolves"),
+    "에버튼": ("Opponent", "Everton"), "웨스트햄": ("Opponent", "West Ham"),
+    "본머스": ("Opponent", "Bournemouth"), "노팅엄": ("Opponent", "Nott'ham Forest"),
+    "크리스탈팰리스": ("Opponent", "Crystal Palace"), "팰리스": ("Opponent", "Crystal Palace"),
+    "사우샘프턴": ("Opponent", "Southampton"), "입스위치": ("Opponent", "Ipswich Town"),
+    "레스터": ("Opponent", "Leicester City"), "레알마드리드": ("Opponent", "es Real Madrid"),
+    "레알": ("Opponent", "es Real Madrid"), "인테르": ("Opponent", "it Inter"),
+    "인터밀란": ("Opponent", "it Inter"), "유벤투스": ("Opponent", "it Juventus"),
+    "파리": ("Opponent", "fr Paris S-G"), "psg": ("Opponent", "fr Paris S-G"),
+    "페예노르트": ("Opponent", "nl Feyenoord"), "스포르팅": ("Opponent", "pt Sporting CP"),
+    "브뤼헤": ("Opponent", "be Club Brugge"),
+    # 대회
+    "프리미어리그": ("Comp", "Premier League"), "epl": ("Comp", "Premier League"),
+    "챔피언스리그": ("Comp", "Champions Lg"), "챔스": ("Comp", "Champions Lg"), "ucl": ("Comp", "Champions Lg"),
+    "fa컵": ("Comp", "FA Cup"), "리그컵": ("Comp", "EFL Cup"), "카라바오컵": ("Comp", "EFL Cup"),
+    "커뮤니티실드": ("Comp", "FA Community Shield"),
+    # 홈/원정
+    "홈경기": ("Venue", "Home"), "원정경기": ("Venue", "Away"), "원정": ("Venue", "Away"),
+}
+
+# 포지션 단어 → 포지션 코드 (데이터의 "FW,MF" 같은 값은 코드가 포함되면 일치)
+POSITION_ALIASES = {"공격수": "FW", "미드필더": "MF", "수비수": "DF", "골키퍼": "GK"}
+
+# "8월 10일", "8/10" 같은 날짜 (시즌 기준: 7~12월은 2024년, 1~6월은 2025년)
+_MONTH_DAY_RE = re.compile(r"(\d{1,2})\s*월\s*(\d{1,2})\s*일|\b(\d{1,2})/(\d{1,2})\b")
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _strip_country(opponent):
+    return re.sub(r"^[a-z]{2} ", "", opponent)
+
+
+def _compact(text):
+    return "".join(tokenize(text))
+
+
+class EntityExtractor:
+    def __init__(self, values):
+        # values: {필드: 데이터에 있는 값 집합}
+        self.values = values
+        self.phrases = {}  # 단어열(tuple) → [(필드, 값)]
+        for field in ("Player", "Opponent", "Comp"):
+            for value in values.get(field, ()):
+                self._add(tokenize(value), field, value)
+                if field == "Opponent":
+                    # "es Real Madrid" → "Real Madrid" 로도 찾는다
+                    self._add(tokenize(_strip_country(value)), field, value)
+        # 다른 선수와 겹치지 않는 성(surname)도 등록 (4글자 이상)
+        # ("James McAtee"/"James Mcatee" 처럼 표기만 다른 같은 선수는 함께 등록)
+        surnames = defaultdict(set)
+        for player in values.get("Player", ()):
+            words = tokenize(player)
+            if len(words) > 1 and len(words[-1]) >= 4:
+                surnames[words[-1]].add(player)
+        for surname, players in surnames.items():
+            if len({_compact(player) for player in players}) == 1:
+                for player in players:
+                    self._add([surname], "Player", player)
+        # 상대팀은 테이블마다 국가 코드가 붙기도 한다 ("es Real Madrid" / "Real Madrid")
+        self.opponent_variants = defaultdict(set)
+        for value in values.get("Opponent", ()):
+            self.opponent_variants[_strip_country(value)].add(value)
+        self.max_phrase = max((len(phrase) for phrase in self.phrases), default=1)
+        self.aliases = {alias: target for alias, target in ALIASES.items() if target[1] in values.get(target[0], ())}
+
+    def _add(self, words, field, value):
+        if words:
+            self.phrases.setdefault(tuple(words), []).append((field, value))
+
+    @classmethod
+    def from_tables(cls, tables):
+        values = defaultdict(set)
+        for frame in tables.values():
+            for field, column in [(f, f) for f in MATCH_FIELDS + PLAYER_FIELDS] + [("Player", "Scorer")]:
+                if column in frame.columns:
+                    values[field].update(format_value(v) for v in frame[column] if not is_missing(v))
+        return cls(dict(values))
+
+    def extract(self, question):
+        """질문에 나온 값을 {필드: 값 집합}으로 반환한다."""
+        found = defaultdict(set)
+        words = tokenize(question)
+        i = 0
+        while i < len(words):
+            # 가장 긴 단어열부터 일치 확인
+            for size in range(min(self.max_phrase, len(words) - i), 0, -1):
+                matches = self.phrases.get(tuple(words[i:i + size]))
+                if matches:
+                    for field, value in matches:
+                        found[field].add(value)
+                    i += size
+                    break
+            else:
+                i += 1
+
+        # 한글 별칭은 조사가 붙어도 찾도록 부분 문자열로, 영문 약어(psg, epl)는 단어로 비교
+        compact = _compact(question)
+        for alias, (field, value) in self.aliases.items():
+            if (alias in words) if alias.isascii() else (alias in compact):
+                found[field].add(value)
+        for alias, code in POSITION_ALIASES.items():
+            if alias in compact:
+                found["Pos"].update(p for p in self.values.get("Pos", ()) if code in p.split(","))
+
+        dates = self.values.get("Date", set())
+        for date in _DATE_RE.findall(question):
+            if date in dates:
+                found["Date"].add(date)
+        for match in _MONTH_DAY_RE.finditer(question):
+            month, day = (int(v) for v in (match.group(1, 2) if match.group(1) else match.group(3, 4)))
+            date = f"{2024 if month >= 7 else 2025}-{month:02d}-{day:02d}"
+            if date in dates:
+                found["Date"].add(date)
+        if found.get("Opponent"):
+            found["Opponent"] = set().union(*(self.opponent_variants[_strip_country(v)] for v in found["Opponent"]))
+        # 선수를 직접 지목했다면 포지션 조건은 필요 없다
+        if found.get("Player"):
+            found.pop("Pos", None)
+        return dict(found)
+
+    def where(self, question):
+        """질문을 Chroma where 필터로 바꾼다. 찾은 값이 없으면 None."""
+        return to_where(self.extract(question))
+
+
+def _group(entities, fields):
+    conditions = [{field: {"$in": sorted(entities[field])}} for field in fields if entities.get(field)]
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def to_where(entities):
+    groups = [g for g in (_group(entities, MATCH_FIELDS), _group(entities, PLAYER_FIELDS)) if g]
+    if not groups:
+        return None
+    return groups[0] if len(groups) == 1 else {"$or": groups}
+
+
+class FilteredRetriever(BaseRetriever):
+    """질문에서 찾은 entity로 후보를 좁힌 뒤 MMR 검색 (결과가 없으면 필터 없이 다시 검색)."""
+    vectorstore: VectorStore
+    extractor: EntityExtractor
+    k: int = 30
+    fetch_k: int = 100
+    lambda_mult: float = 0.5
+    collection: Optional[Any] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _search(self, query, where=None):
+        return mmr_search(
+            self.vectorstore, query, self.k, self.fetch_k, self.lambda_mult, filter=where, collection=self.collection
+        )
+
+    def _get_relevant_documents(self, query, *, run_manager: CallbackManagerForRetrieverRun):
+        where = self.extractor.where(query)
+        if where:
+            docs = self._search(query, where)
+            if docs:
+                return docs
+        return self._search(query)
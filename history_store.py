@@ -0,0 +1,106 @@
+"""대화 기록 저장소 (SQLite, 메시지당 한 행).
+
+세션 id는 URL(?session=...)에 남기므로 새로고침하거나 나중에 같은 주소로 들어오면 대화를 이어간다.
+화면에는 최근 몇 개의 메시지만 읽어 그리고, 대화 기억(memory.py)의 누적 요약도 세션 행에 저장해
+다시 들어왔을 때 전체 기록을 읽거나 다시 요약하지 않는다.
+
+    store = HistoryStore(config.HISTORY_DB_PATH)
+    session_id = store.create_session()
+    store.append(session_id, "user", "맨유전 결과")
+    store.latest(session_id, limit=20)          # [{"role": ..., "content": ...}, ...] (오래된 순)
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class HistoryStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "summary TEXT NOT NULL DEFAULT '', summarized_turns INTEGER NOT NULL DEFAULT 0)"
+            )
+            # turn: 이 메시지 앞까지 답변이 끝난 턴 수 (질문과 그 답변이 같은 번호를 가지며,
+            # 답변 없이 중단된 질문은 다음 질문과 번호가 겹쳐 짝을 만들지 않는다)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, turn INTEGER NOT NULL, "
+                "role TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create_session(self):
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO sessions (id, created_at, updated_at) VALUES (?, ?, ?)", (session_id, now, now))
+        return session_id
+
+    def exists(self, session_id):
+        return self._connect().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def append(self, session_id, role, content):
+        now = time.time()
+        with self._connect() as conn:
+            turn = conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ? AND role = 'assistant'", (session_id,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO messages (session_id, turn, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, turn, role, content, now)
+            )
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+
+    def count(self, session_id):
+        return self._connect().execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def latest(self, session_id, limit):
+        """최근 limit개 메시지 (오래된 순)."""
+        rows = self._connect().execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?", (session_id, limit)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def turns(self, session_id, start=0):
+        """start번째 턴부터의 (질문, 답변) 목록. 답변 없이 중단된 질문은 제외한다."""
+        rows = self._connect().execute(
+            "SELECT turn, role, content FROM messages WHERE session_id = ? AND turn >= ? ORDER BY id",
+            (session_id, start)
+        ).fetchall()
+        questions, pairs = {}, []
+        for turn, role, content in rows:
+            if role == "user":
+                questions[turn] = content
+            elif turn in questions:
+                pairs.append((questions.pop(turn), content))
+        return pairs
+
+    def summary(self, session_id):
+        """(누적 요약, 요약에 합쳐진 턴 수)."""
+        row = self._connect().execute(
+            "SELECT summary, summarized_turns FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return row if row else ("", 0)
+
+    def save_summary(self, session_id, summary, summarized_turns):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sessions SET summary = ?, summarized_turns = ? WHERE id = ?",
+                (summary, summarized_turns, session_id)
+            )
@@ -0,0 +1,243 @@
+"""CSV 데이터를 ChromaDB에 반영하는 수집(ingestion) 명령.
+
+    python ingest.py            # 변경된 파일/행만 반영
+    python ingest.py --force    # manifest를 무시하고 모든 파일을 다시 비교
+
+각 행(row)은 내용 해시 기반의 고정 ID를 가지므로 여러 번 실행해도 중복이 생기지 않고,
+새로 생기거나 바뀐 행만 임베딩하며 사라진 행은 삭제한다.
+파일 해시(와 직렬화/metadata 버전)는 manifest에 기록해 두고, 바뀌지 않은 파일은 아예 읽지 않는다.
+내용이 같은 행은 다시 임베딩하지 않고 metadata(날짜, 상대팀, 대회, 선수 등)만 갱신한다.
+임베딩은 ingest_embedding.py에서 배치/동시 실행되며, 실패 후 다시 실행하면 이어서 진행한다.
+폼/상대 전적/포메이션별 성적/선수별 90분당 기록 같은 분석 뷰(analytics.py)도 함께 계산해 저장하고,
+뷰의 요약 문서를 source="analytics"로 같은 방식으로 반영한다.
+마지막으로 키워드 검색용 BM25 색인(keyword_index.py)을 컬렉션 전체로 다시 만든다.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import os
+
+from langchain.docstore.document import Document
+
+import analytics
+import config
+import datastore
+import quantized_index
+import resources
+from ingest_embedding import clear_checkpoint, embed_and_upsert
+from keyword_index import INDEX_PATH, KeywordIndex
+from quantized_index import INDEX_DIR as QUANTIZED_INDEX_DIR
+from serialize import METADATA_VERSION, SERIALIZER_VERSION, row_metadata, serialize_row
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = os.path.join(config.PERSIST_DIRECTORY, "ingest_manifest.json")
+
+#  처리할 CSV 파일 리스트
+CSV_FILES = [
+    "./data/mancity_goalkeeping.csv",
+    "./data/mancity_passing.csv",
+    "./data/mancity_shooting.csv",
+    "./data/mancity_pass_types.csv",
+    "./data/mancity_scores_fixtures.csv",
+    "./data/Advanced Goalkeeping.csv",
+    "./data/Defensive Actions.csv",
+    "./data/Goal and Shot Creation.csv",
+    "./data/Goalkeeper_summary.csv",
+    "./data/Goalkeeping.csv",
+    "./data/Miscellaneous_Stats.csv",
+    "./data/Pass Types.csv",
+    "./data/Passing.csv",
+    "./data/Player_summary.csv",
+    "./data/Playing_Time.csv",
+    "./data/Possetion.csv",
+    "./data/Shooting.csv",
+    "./data/Standard Stats.csv",
+    "./data/mancity_defensive_actions.csv",
+    "./data/mancity_goal_and_shot_creation.csv",
+    "./data/mancity_goal_logs.csv",
+    "./data/mancity_miscellaneous_stats.csv",
+    "./data/mancity_player_wages.csv",
+    "./data/mancity_possession.csv"
+]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_id(source, content):
+    # 같은 파일의 같은 내용이면 항상 같은 ID
+    return hashlib.sha256(f"{source}\x00{content}".encode("utf-8")).hexdigest()[:32]
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"files": {}}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def data_version():
+    """인덱스에 반영된 데이터의 버전 (manifest 내용의 해시). 수집으로 인덱스가 바뀌면 달라진다."""
+    if not os.path.exists(MANIFEST_PATH):
+        return "none"
+    with open(MANIFEST_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def build_documents(file):
+    """CSV 파일을 {ID: Document} 로 변환한다. 한 행은 하나의 문서가 된다."""
+    table = datastore.table_name(file)
+    df = datastore.load_table(table)
+    documents = {}
+    for i, row in enumerate(df.to_dict("records")):
+        content = serialize_row(table, row)
+        documents[row_id(file, content)] = Document(
+            page_content=content,
+            metadata={"source": file, "row_index": i, **row_metadata(row)}
+        )
+    return documents
+
+
+def analytics_documents(views):
+    """분석 뷰의 요약 문서를 {ID: Document} 로 변환한다."""
+    documents = {}
+    for i, (content, metadata) in enumerate(analytics.build_documents(views)):
+        documents[row_id(analytics.SOURCE, content)] = Document(
+            page_content=content,
+            metadata={"source": analytics.SOURCE, "row_index": i, **metadata}
+        )
+    return documents
+
+
+def existing_ids(db, source):
+    return set(db.get(where={"source": source}, include=[])["ids"])
+
+
+def plan_source(db, source, documents):
+    """source의 저장된 행과 documents를 비교해 (추가할 {ID: Document}, 삭제할 ID 목록)을 반환한다."""
+    current = existing_ids(db, source)
+    new_documents = {doc_id: doc for doc_id, doc in documents.items() if doc_id not in current}
+    stale_ids = sorted(current - documents.keys())
+    return new_documents, stale_ids
+
+
+def run(files=CSV_FILES, force=False, **embed_options):
+    db = resources.get_vectorstore()
+    manifest = load_manifest()
+    stats = {"skipped": 0, "added": 0, "deleted": 0}
+
+    # 1) 바뀐 파일만 읽어서 추가/삭제 대상을 정리
+    sources = [
+        (file, {"sha256": file_sha256(file), "serializer": SERIALIZER_VERSION, "metadata": METADATA_VERSION},
+         functools.partial(build_documents, file))
+        for file in files
+    ]
+    if config.ANALYTICS_ENABLED:
+        # 분석 뷰는 매번 다시 계산해서 저장하고 (수십 ms), 내용이 바뀐 경우에만 요약 문서를 반영
+        views = analytics.build_views()
+        analytics.save_views(views)
+        entry = {"sha256": analytics.digest(views), "analytics": analytics.ANALYTICS_VERSION,
+                 "metadata": METADATA_VERSION}
+        sources.append((analytics.SOURCE, entry, functools.partial(analytics_documents, views)))
+
+    pending_files = {}
+    new_documents = {}
+    kept_documents = {}
+    stale_ids = []
+    for file, entry, make_documents in sources:
+        if not force and manifest["files"].get(file) == entry:
+            stats["skipped"] += 1
+            continue
+
+        documents = make_documents()
+        added, deleted = plan_source(db, file, documents)
+        new_documents.update(added)
+        kept_documents.update((doc_id, doc) for doc_id, doc in documents.items() if doc_id not in added)
+        stale_ids.extend(deleted)
+        pending_files[file] = entry
+        logger.info("%s: +%d -%d", file, len(added), len(deleted))
+
+    # 목록에서 빠진 파일의 행은 모두 삭제
+    removed_files = sorted(set(manifest["files"]) - {file for file, _, _ in sources})
+    for file in removed_files:
+        _, deleted = plan_source(db, file, {})
+        stale_ids.extend(deleted)
+        logger.info("%s: removed (-%d)", file, len(deleted))
+
+    # 2) 삭제 → 기존 행 metadata 갱신 → 임베딩/upsert (배치, 동시 실행, 체크포인트)
+    if stale_ids:
+        db.delete(ids=stale_ids)
+    kept_ids = list(kept_documents)
+    for start in range(0, len(kept_ids), config.INGEST_BATCH_SIZE):
+        batch = kept_ids[start:start + config.INGEST_BATCH_SIZE]
+        db._collection.update(ids=batch, metadatas=[kept_documents[doc_id].metadata for doc_id in batch])
+    stats["embedding"] = embed_and_upsert(db, new_documents, **embed_options)
+    stats["added"] = len(new_documents)
+    stats["deleted"] = len(stale_ids)
+
+    # 3) 모두 성공한 뒤에만 manifest를 갱신하고 체크포인트를 지운다
+    manifest["files"].update(pending_files)
+    for file in removed_files:
+        del manifest["files"][file]
+    save_manifest(manifest)
+    clear_checkpoint()
+
+    # 4) 컬렉션이 바뀌었거나 색인이 없으면 키워드 색인을 다시 만든다
+    if pending_files or removed_files or not os.path.exists(INDEX_PATH):
+        index = KeywordIndex.from_collection(db)
+        index.save(INDEX_PATH)
+        logger.info("keyword index: %d documents, %d terms", len(index), len(index.postings))
+        # 축소/양자화 색인을 쓰고 있다면 같은 옵션으로 다시 만든다
+        if os.path.exists(os.path.join(QUANTIZED_INDEX_DIR, "meta.json")):
+            options = quantized_index.QuantizedIndex(QUANTIZED_INDEX_DIR).options
+            quantized_index.build(db, QUANTIZED_INDEX_DIR, options["reduce"], options["dimensions"],
+                                  options["dtype"], options["rescore"])
+            logger.info("quantized index rebuilt: %s", options)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV 데이터를 ChromaDB에 증분 반영합니다.")
+    parser.add_argument("--force", action="store_true", help="manifest를 무시하고 모든 파일을 비교")
+    parser.add_argument("--batch-tokens", type=int, default=config.INGEST_BATCH_TOKENS, help="임베딩 배치당 최대 토큰 수")
+    parser.add_argument("--batch-size", type=int, default=config.INGEST_BATCH_SIZE, help="임베딩 배치당 최대 문서 수")
+    parser.add_argument("--workers", type=int, default=config.INGEST_MAX_WORKERS, help="동시에 보낼 임베딩 요청 수")
+    parser.add_argument("--max-retries", type=int, default=config.INGEST_MAX_RETRIES, help="배치별 최대 재시도 횟수")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    stats = run(
+        force=args.force,
+        max_tokens=args.batch_tokens,
+        max_size=args.batch_size,
+        max_workers=args.workers,
+        max_retries=args.max_retries,
+    )
+    embedding = stats["embedding"]
+    if embedding["rows"]:
+        print(
+            f"⏱️ 임베딩 {embedding['seconds']:.1f}초: "
+            f"{embedding['rows'] / embedding['seconds']:.1f} rows/s, "
+            f"{embedding['tokens'] / embedding['seconds']:.0f} tokens/s"
+        )
+    print(f"✅ 수집 완료: 추가 {stats['added']}건, 삭제 {stats['deleted']}건, 변경 없는 파일 {stats['skipped']}개")
+
+
+if __name__ == "__main__":
+    main()
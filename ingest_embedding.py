@@ -0,0 +1,125 @@
+"""수집(ingestion)의 임베딩 단계.
+
+문서를 토큰 예산 단위 배치로 묶어 여러 배치를 동시에 임베딩하고, 배치가 끝날 때마다
+ChromaDB에 upsert 한 뒤 체크포인트에 기록한다. 중간에 실패해도 다시 실행하면
+체크포인트에 남은 문서는 건너뛰고 이어서 진행한다.
+"""
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PATH = os.path.join(config.PERSIST_DIRECTORY, "ingest_checkpoint.jsonl")
+
+
+def make_batches(items, max_tokens=config.INGEST_BATCH_TOKENS, max_size=config.INGEST_BATCH_SIZE):
+    """(id, Document, 토큰 수) 목록을 토큰/개수 상한에 맞춰 배치로 나눈다."""
+    batch, batch_tokens = [], 0
+    for item in items:
+        n_tokens = item[2]
+        if batch and (batch_tokens + n_tokens > max_tokens or len(batch) >= max_size):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += n_tokens
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                done.update(json.loads(line))
+    return done
+
+
+def clear_checkpoint(path=CHECKPOINT_PATH):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _embed_with_backoff(embeddings, texts, max_retries):
+    for attempt in range(max_retries + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:  # rate limit, timeout 등
+            if attempt == max_retries:
+                raise
+            delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+            logger.warning("embedding batch failed (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+
+
+def embed_and_upsert(
+    db,
+    documents,
+    max_tokens=config.INGEST_BATCH_TOKENS,
+    max_size=config.INGEST_BATCH_SIZE,
+    max_workers=config.INGEST_MAX_WORKERS,
+    max_retries=config.INGEST_MAX_RETRIES,
+    checkpoint_path=CHECKPOINT_PATH,
+):
+    """{ID: Document}를 임베딩해 db에 upsert 하고 처리량 통계를 반환한다."""
+    done = load_checkpoint(checkpoint_path)
+    if done:
+        logger.info("resuming from checkpoint: %d rows already embedded", len(done))
+
+    items = [
+        (doc_id, doc, count_tokens(doc.page_content))
+        for doc_id, doc in documents.items()
+        if doc_id not in done
+    ]
+    stats = {"rows": 0, "tokens": 0, "batches": 0, "seconds": 0.0}
+    if not items:
+        return stats
+
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        futures = {
+            pool.submit(_embed_with_backoff, db.embeddings, [doc.page_content for _, doc, _ in batch], max_retries): batch
+            for batch in make_batches(items, max_tokens, max_size)
+        }
+        # upsert와 체크포인트 기록은 이 스레드에서만 수행
+        try:
+            for future in as_completed(futures):
+                batch = futures[future]
+                ids = [doc_id for doc_id, _, _ in batch]
+                db._collection.upsert(
+                    ids=ids,
+                    embeddings=future.result(),
+                    documents=[doc.page_content for _, doc, _ in batch],
+                    metadatas=[doc.metadata for _, doc, _ in batch],
+                )
+                checkpoint.write(json.dumps(ids) + "\n")
+                checkpoint.flush()
+
+                stats["rows"] += len(batch)
+                stats["tokens"] += sum(n_tokens for _, _, n_tokens in batch)
+                stats["batches"] += 1
+        except BaseException:
+            # 실패하면 아직 시작하지 않은 배치는 취소 (완료된 배치는 체크포인트에 남아 있음)
+            for future in futures:
+                future.cancel()
+            raise
+
+    stats["seconds"] = time.perf_counter() - start
+    logger.info(
+        "embedded %d rows / %d tokens in %d batches: %.1f rows/s, %.0f tokens/s",
+        stats["rows"], stats["tokens"], stats["batches"],
+        stats["rows"] / stats["seconds"], stats["tokens"] / stats["seconds"]
+    )
+    return stats
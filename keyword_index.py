@@ -0,0 +1,231 @@
+"""행 문서에 대한 키워드(BM25) 역색인과 벡터 검색을 합친 Hybrid Retriever.
+
+"Erling Haaland", "Manchester Utd", "2024-08-10" 처럼 정확한 이름/날짜가 들어간 질문은
+임베딩 검색보다 키워드 색인이 빠르고 정확하다. 색인은 수집(ingest.py) 때 만들어
+PERSIST_DIRECTORY/keyword_index.json 에 저장되고, 앱은 파일이 바뀌면 다시 읽는다.
+
+검색 순서:
+1) 질문에서 인식한 선수 또는 경기(상대팀/대회/날짜) 값의 희귀 단어를 모두 포함하는 행이 k개 이하이면
+   그 행만 반환 (벡터 검색 생략). "경기", "득점" 같은 일반 단어는 드물어도 이 경로를 타지 않는다.
+2) 아니면 키워드 결과와 벡터 결과를 Reciprocal Rank Fusion(RRF)으로 합친다.
+"""
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Optional
+
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+import config
+
+INDEX_PATH = os.path.join(config.PERSIST_DIRECTORY, "keyword_index.json")
+INDEX_VERSION = 1
+
+# 날짜는 한 단어로, 영문/숫자와 한글은 서로 붙어 있어도 나눈다 ("haaland의" → "haaland", "의")
+_TOKEN_RE = re.compile(r"\d{4}-\d{2}-\d{2}|[a-z0-9]+|[가-힣]+")
+
+
+def tokenize(text):
+    # 악센트 제거 (Rúben → ruben, Gündoğan → gundogan). 한글은 NFC로 다시 조합
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = unicodedata.normalize("NFC", "".join(ch for ch in text if not unicodedata.combining(ch)))
+    return _TOKEN_RE.findall(text)
+
+
+def matches_where(metadata, where):
+    """metadata가 entities.to_where()로 만든 필터를 만족하는지 (색인 결과 거르기용)."""
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_where(metadata, condition) for condition in where["$and"])
+    if "$or" in where:
+        return any(matches_where(metadata, condition) for condition in where["$or"])
+    (field, condition), = where.items()
+    return metadata.get(field) in condition["$in"]
+
+
+def document_key(doc):
+    # 벡터 검색 결과와 키워드 결과를 같은 행으로 묶기 위한 키
+    metadata = doc.metadata or {}
+    if "source" in metadata and "row_index" in metadata:
+        return metadata["source"], metadata["row_index"]
+    return doc.page_content
+
+
+class KeywordIndex:
+    def __init__(self, ids, documents, metadatas, k1=1.2, b=0.75):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # 단어 → [(문서 번호, 빈도)]
+        self.lengths = []
+        for i, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def search(self, query, k=30):
+        """BM25 상위 k개의 (문서 번호, 점수) 목록."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def exact_matches(self, terms, max_df):
+        """terms 중 희귀 단어(문서 비율 ≤ max_df)를 모두 포함하는 문서 번호 집합. 희귀 단어가 없으면 None."""
+        rare = [
+            term for term in set(terms)
+            if term in self.postings and len(self.postings[term]) <= max_df * len(self)
+        ]
+        if not rare:
+            return None
+        matched = None
+        for term in rare:
+            docs = {i for i, _ in self.postings[term]}
+            matched = docs if matched is None else matched & docs
+        return matched
+
+    def document(self, i):
+        return Document(page_content=self.documents[i], metadata=self.metadatas[i])
+
+    # ----- 저장 / 불러오기 -----
+    def save(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": INDEX_VERSION, "ids": self.ids, "documents": self.documents, "metadatas": self.metadatas},
+                f, ensure_ascii=False
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"keyword index version mismatch: {path}")
+        return cls(data["ids"], data["documents"], data["metadatas"])
+
+    @classmethod
+    def from_collection(cls, db):
+        """Chroma 컬렉션에 저장된 모든 행으로 색인을 만든다."""
+        data = db.get(include=["documents", "metadatas"])
+        return cls(data["ids"], data["documents"], data["metadatas"])
+
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def load_index(path=INDEX_PATH):
+    """색인 파일이 바뀌었을 때만 다시 읽는다. 파일이 없으면 None."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _load_lock:
+        if _loaded.get(path, (None,))[0] != mtime:
+            _loaded[path] = (mtime, KeywordIndex.load(path))
+        return _loaded[path][1]
+
+
+def rrf_fuse(ranked_lists, k, rrf_k=60):
+    """여러 순위 목록(Document 리스트)을 Reciprocal Rank Fusion으로 합쳐 상위 k개를 반환한다."""
+    scores = defaultdict(float)
+    documents = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked):
+            key = document_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=lambda key: -scores[key])[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    vector_retriever: BaseRetriever
+    index_path: str = INDEX_PATH
+    k: int = 30
+    keyword_k: int = 30
+    rrf_k: int = 60
+    exact_max_df: float = 0.05
+    # entities.EntityExtractor: 질문의 선수/상대팀/대회/날짜로 키워드 결과도 벡터 검색과 같은 조건으로 거른다
+    extractor: Optional[Any] = None
+
+    def _get_relevant_documents(self, query, *, run_manager: CallbackManagerForRetrieverRun):
+        index = load_index(self.index_path)
+        if index is None or not len(index):
+            return self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+        allowed = self._allowed(index, query)
+
+        # 1) 인식한 이름/날짜가 정확히 일치하는 행이 충분히 적으면 키워드 결과만 사용
+        terms = self._identifier_terms(query)
+        matched = index.exact_matches(terms, self.exact_max_df)
+        if matched and allowed is not None:
+            matched &= allowed
+        if matched and len(matched) <= self.k:
+            # 별칭("맨유")으로 찾은 값은 질문에 원래 이름이 없으므로 그 단어도 함께 점수에 넣는다
+            scores = dict(index.search(" ".join([query, *terms]), k=len(index)))
+            return [index.document(i) for i in sorted(matched, key=lambda i: -scores.get(i, 0.0))]
+
+        # 2) 키워드 + 벡터 결과를 RRF로 합침
+        ranked = index.search(query, k=len(index) if allowed is not None else self.keyword_k)
+        if allowed is not None:
+            ranked = [(i, score) for i, score in ranked if i in allowed]
+        keyword_docs = [index.document(i) for i, _ in ranked[:self.keyword_k]]
+        vector_docs = self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return rrf_fuse([keyword_docs, vector_docs], self.k, self.rrf_k)
+
+    def _identifier_terms(self, query):
+        """정확 일치 경로에 쓸 단어: 질문에서 인식한 날짜와 선수/상대팀/대회 값의 단어만.
+
+        경기 항목(날짜/상대팀/대회)과 선수를 함께 물으면 ("홀란드 맨유전 득점") 두 이름이 모두 있는 행(골 기록)만
+        남게 되므로 이 경로를 쓰지 않는다. 한 필드에 값이 여러 개면 모든 값에 공통인 단어만 쓴다
+        ("es Real Madrid" / "Real Madrid" → real, madrid).
+        """
+        if self.extractor is None:
+            return []
+        entities = self.extractor.extract(query)
+        match_fields = [field for field in ("Date", "Opponent", "Comp") if entities.get(field)]
+        if match_fields and entities.get("Player"):
+            return []
+        terms = []
+        for field in match_fields or ["Player"]:
+            values = [set(tokenize(value)) for value in entities.get(field, ())]
+            if values:
+                terms += sorted(set.intersection(*values))
+        return terms
+
+    def _allowed(self, index, query):
+        # 필터에 맞는 문서 번호 집합 (필터가 없거나 맞는 문서가 없으면 None = 제한 없음)
+        if self.extractor is None:
+            return None
+        where = self.extractor.where(query)
+        if not where:
+            return None
+        allowed = {i for i, metadata in enumerate(index.metadatas) if matches_where(metadata, where)}
+        return allowed or None
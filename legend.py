@@ -0,0 +1,330 @@
+"""범례(용어 설명).
+
+예전에는 약 590줄짜리 column_definitions 전체를 매 요청마다 시스템 프롬프트에 넣었지만,
+이제는 중복을 제거한 사전(LEGEND)에서 이번 질문/문맥에 실제로 등장한 열만 골라
+토큰 예산 안에서 프롬프트에 넣는다.
+"""
+import re
+
+import config
+from tokens import count_tokens
+
+LEGEND = {
+    # 경기 정보
+    "Date": "경기 날짜",
+    "Time": "경기 시간",
+    "Comp": "대회 (예: 프리미어리그, 챔피언스리그, EFL컵 등)",
+    "Round": "대회 단계/라운드 (리그 경기 주차 또는 컵 대회 단계)",
+    "Day": "경기 요일 (Sat: 토요일, Sun: 일요일 등)",
+    "Venue": "경기 장소 (Home: 홈경기, Away: 원정경기)",
+    "Result": "경기 결과 (W: 승리, D: 무승부, L: 패배)",
+    "GF": "득점 (Goals For, 팀이 넣은 골 수)",
+    "GA": "실점 (Goals Against, 상대 팀이 넣은 골 수)",
+    "GF_Shootout": "승부차기 득점",
+    "GA_Shootout": "승부차기 실점",
+    "Opponent": "상대 팀",
+    "xG": "기대 득점 (Expected Goals, 골 확률 기반 예상 득점)",
+    "xGA": "기대 실점 (Expected Goals Against)",
+    "Poss": "점유율 (%)",
+    "Attendance": "관중 수",
+    "Captain": "경기 당시 주장",
+    "Formation": "사용한 포메이션",
+    "Opp Formation": "상대 팀의 포메이션",
+    "Referee": "주심 (경기 심판)",
+    "Match Report": "경기 상세 기록(보고서) 링크",
+    "Matches": "경기별 상세 기록 링크",
+    "Notes": "추가 메모",
+
+    # 득점 기록 (mancity_goal_logs)
+    "Rk": "순번",
+    "Scorer": "득점 선수",
+    "Assist": "도움 선수",
+    "Start": "선발 출전 여부 (Y/N)",
+    "Body Part": "득점한 신체 부위",
+    "Distance": "슈팅 거리 (야드)",
+    "Minute": "득점 시간 (분)",
+    "Goalkeeper against": "상대 골키퍼",
+
+    # 슈팅
+    "Gls": "득점 수 (Goals)",
+    "Sh": "슈팅 시도 횟수 (Shots) / 블록 항목에서는 슛 차단 횟수 / SCA·GCA 항목에서는 슛으로 또 다른 기회를 만든 횟수",
+    "SoT": "유효 슈팅 수 (Shots on Target)",
+    "SoT%": "유효 슈팅 비율 (Shots on Target Percentage)",
+    "Sh/90": "90분당 슈팅 횟수",
+    "SoT/90": "90분당 유효 슈팅 횟수",
+    "G/Sh": "슈팅 대비 득점률 (Goals per Shot)",
+    "G/SoT": "유효 슈팅 대비 득점률 (Goals per Shot on Target)",
+    "Dist": "평균 슈팅 거리",
+    "FK": "프리킥 슈팅 횟수 / 패스 유형에서는 프리킥 패스 횟수 / 골키퍼 항목에서는 프리킥 실점",
+    "PK": "페널티킥 득점 수",
+    "PKatt": "페널티킥 시도 횟수 (골키퍼 항목에서는 상대 팀의 시도 횟수)",
+    "npxG": "페널티킥 제외 기대 득점 (Non-Penalty Expected Goals)",
+    "npxG/Sh": "슈팅당 페널티킥 제외 기대 득점",
+    "G-xG": "실제 득점과 기대 득점 차이 (Goals minus Expected Goals)",
+    "np:G-xG": "페널티킥 제외 실제 득점과 기대 득점 차이",
+
+    # 골키퍼
+    "SoTA": "상대 팀의 유효 슈팅 수 (Shots on Target Against)",
+    "Saves": "선방 횟수",
+    "Save%": "선방률 (%)",
+    "CS": "클린 시트 (무실점 경기 수)",
+    "CS%": "클린 시트 비율 (%)",
+    "GA90": "90분당 실점 수",
+    "PSxG": "슈팅 후 기대 실점 (Post-Shot Expected Goals)",
+    "PSxG+/-": "PSxG - 실점, 골키퍼 선방 효과 지표 (Post-Shot xG +/-)",
+    "PSxG/SoT": "유효 슈팅당 PSxG",
+    "PSxG-GA/90": "90분당 PSxG+/-",
+    "PKA": "페널티킥 허용(실점) 횟수",
+    "PKsv": "페널티킥 선방 횟수",
+    "PKm": "상대의 페널티킥 실축 횟수",
+    "OG": "자책골 횟수",
+    "Launched": "롱패스 (40야드 이상)",
+    "Passes": "골키퍼 패스 (골킥 제외)",
+    "Att (GK)": "골키퍼의 패스 시도 횟수",
+    "Thr": "골키퍼의 스로 횟수",
+    "Launch%": "롱패스 비율 (%)",
+    "AvgLen": "패스 평균 거리",
+    "Goal Kicks": "골킥",
+    "Crosses": "상대 크로스 방어",
+    "Opp": "상대 팀 크로스 시도 횟수",
+    "Stp": "크로스 방어(차단) 성공 횟수",
+    "Stp%": "크로스 방어 성공률 (%)",
+    "Sweeper": "스위퍼 (페널티 박스 밖 수비 개입)",
+    "#OPA": "페널티 박스 밖 수비 개입 횟수",
+    "AvgDist": "골문에서 수비 개입까지의 평균 거리",
+    "W": "승리 경기 수",
+    "D": "무승부 경기 수",
+    "L": "패배 경기 수",
+
+    # 패스
+    "Cmp": "패스 성공 횟수",
+    "Att": "시도 횟수 (패스, 드리블 돌파, 1대1 경합 등 항목에 따라 다름)",
+    "Cmp%": "패스 성공률 (%)",
+    "Total": "전체 패스",
+    "Short": "짧은 패스 (5~15야드)",
+    "Medium": "중간 거리 패스 (15~30야드)",
+    "Long": "긴 패스 (30야드 이상)",
+    "TotDist": "패스(또는 운반)의 총 이동 거리 (야드)",
+    "Passing Distance": "패스의 총 이동 거리 (야드)",
+    "PrgDist": "전진 거리 (야드, 패스 또는 운반)",
+    "Ast": "어시스트 수",
+    "xAG": "기대 어시스트 (Expected Assisted Goals)",
+    "xA": "패스 기반 기대 어시스트 (Expected Assists)",
+    "A-xAG": "어시스트 - 기대 어시스트",
+    "KP": "키패스 (슈팅으로 이어진 패스) 횟수",
+    "1/3": "상대 진영 최종 1/3 지역으로 보낸 패스 (운반 항목에서는 운반) 횟수",
+    "PPA": "페널티 지역으로 보낸 패스 횟수",
+    "CrsPA": "페널티 지역으로 보낸 크로스 횟수",
+    "PrgP": "전진 패스 횟수 (Progressive Passes)",
+
+    # 패스 유형
+    "Pass Types": "패스 유형",
+    "Passes attempted": "패스 시도 횟수",
+    "Live": "오픈 플레이(살아있는 볼)에서의 패스 또는 터치",
+    "Dead": "정지 상황(세트피스 포함)에서의 패스",
+    "TB": "스루 패스 횟수",
+    "Sw": "스위치 패스 (긴 대각선 방향 전환 패스) 횟수",
+    "Crs": "크로스 횟수",
+    "TI": "스로인 횟수",
+    "CK": "코너킥 횟수",
+    "Corner Kicks": "코너킥 유형",
+    "In": "인스윙 코너킥 (안쪽으로 감기는 코너킥) 횟수",
+    "Out": "아웃스윙 코너킥 (바깥쪽으로 감기는 코너킥) 횟수",
+    "Str": "직선 코너킥 횟수",
+    "Outcomes": "패스 결과",
+    "Inswinging ConerKicks": "인스윙 코너킥 횟수",
+    "Outswinging Conerkicks": "아웃스윙 코너킥 횟수",
+    "Straight Conerkicks": "직선 코너킥 횟수",
+    "Passes completed": "패스 성공 횟수",
+    "Passes offside": "오프사이드가 된 패스 횟수",
+    "Passes blocked": "상대에게 차단된 패스 횟수",
+    "Passes into Final Third": "상대 진영 최종 1/3 지역으로 보낸 패스 횟수",
+    "Total passing distance": "패스의 총 이동 거리 (야드)",
+    "Off": "오프사이드 횟수 (패스 결과에서는 오프사이드가 된 패스)",
+    "Blocks": "차단 횟수 (수비 항목: 슛+패스 차단, 패스 결과: 상대에게 차단된 패스)",
+
+    # 슛/골 기회 창출
+    "SCA": "슛 기회를 창출한 횟수 (Shot-Creating Actions)",
+    "SCA90": "90분당 슛 기회 창출 횟수",
+    "SCA Types": "슛 기회 창출 유형",
+    "GCA": "골로 이어진 기회를 창출한 횟수 (Goal-Creating Actions)",
+    "GCA90": "90분당 골 기회 창출 횟수",
+    "GCA Types": "골 기회 창출 유형",
+    "PassLive": "오픈 플레이 패스로 슛/골 기회를 만든 횟수",
+    "PassDead": "세트피스 패스로 슛/골 기회를 만든 횟수",
+    "TO": "드리블 돌파(Take-On)로 슛/골 기회를 만든 횟수",
+    "Fld": "파울을 당한 횟수 (SCA·GCA 항목에서는 파울 유도로 기회를 만든 횟수)",
+    "Def": "수비 행동으로 슛/골 기회를 만든 횟수",
+
+    # 수비
+    "Tackles": "태클 관련 데이터",
+    "Tkl": "태클 성공 횟수 (Tackles)",
+    "TklW": "태클 후 공을 탈취한 횟수 (Tackles Won)",
+    "Def 3rd": "수비 지역(Defensive Third)에서의 태클/터치 횟수",
+    "Mid 3rd": "중원 지역(Middle Third)에서의 태클/터치 횟수",
+    "Att 3rd": "공격 지역(Attacking Third)에서의 태클/터치 횟수",
+    "Challenges": "드리블러에 대한 태클 경합 (Challenges)",
+    "Tkl%": "드리블러 태클 성공률 (%)",
+    "Lost": "경합에서 패배한 횟수",
+    "Dribblers tkl": "드리블러 태클 성공 횟수",
+    "Dribbles challenged": "드리블러에 대한 태클 시도 횟수",
+    "Dribblers Tkl%": "드리블러 태클 성공률 (%)",
+    "Challenges Lost": "드리블러 경합에서 패배한 횟수",
+    "Sh blocked": "슛 차단 횟수",
+    "Pass blocked": "패스 차단 횟수",
+    "Pass": "패스 차단 횟수",
+    "Int": "인터셉트 횟수 (Interceptions)",
+    "Tkl+Int": "태클 + 인터셉트 합산 횟수",
+    "Clr": "걷어낸 횟수 (Clearances)",
+    "Err": "상대 슈팅으로 이어진 수비 실수 횟수 (Error)",
+
+    # 점유
+    "Touches": "공을 터치한 총 횟수",
+    "Def Pen": "수비 페널티 지역에서의 터치 횟수",
+    "Att Pen": "상대 페널티 지역에서의 터치 횟수",
+    "Take-Ons": "드리블 돌파 (Take-Ons)",
+    "Succ": "드리블 돌파 성공 횟수",
+    "Succ%": "드리블 돌파 성공률 (%)",
+    "Tkld": "드리블 중 태클 당한 횟수",
+    "Tkld%": "드리블 중 태클 당한 비율 (%)",
+    "Carries": "공을 몰고 운반한 횟수",
+    "PrgC": "전진 운반 횟수 (Progressive Carries)",
+    "CPA": "상대 페널티 지역까지 공을 운반한 횟수",
+    "Mis": "볼 컨트롤 실수로 공을 잃은 횟수",
+    "Dis": "상대 수비에게 공을 빼앗긴 횟수",
+    "Receiving": "패스 수신",
+    "Rec": "패스를 받은 횟수",
+    "PrgR": "전진 패스를 받은 횟수 (Progressive Passes Received)",
+
+    # 기타 기록
+    "CrdY": "옐로카드 수",
+    "CrdR": "레드카드 수",
+    "2CrdY": "두 번째 옐로카드로 퇴장당한 횟수",
+    "Fls": "파울한 횟수 (Fouls Committed)",
+    "PKwon": "페널티킥을 얻어낸 횟수",
+    "PKcon": "페널티킥을 허용한 횟수",
+    "Recov": "볼 회수 횟수 (Recoveries)",
+    "Aerial Duels": "공중볼 경합",
+    "Won": "공중볼 경합 승리 횟수",
+    "Won%": "공중볼 경합 승률 (%)",
+
+    # 선수 정보/출전 시간
+    "Player": "선수 이름",
+    "Nation": "국적",
+    "Pos": "포지션 (FW: 공격수, MF: 미드필더, DF: 수비수, GK: 골키퍼)",
+    "Age": "나이",
+    "Weekly Wages": "주급 (파운드, 괄호 안은 유로/달러 환산)",
+    "Annual Wages": "연봉 (파운드, 괄호 안은 유로/달러 환산)",
+    "Playing Time": "출전 시간",
+    "MP": "경기 출전 횟수 (Matches Played)",
+    "Starts": "선발 출전 횟수",
+    "Min": "총 출전 시간 (분)",
+    "90s": "90분 단위로 환산한 출전 시간",
+    "Minutes played divided by 90": "90분 단위로 환산한 출전 시간",
+    "Mn/MP": "경기당 평균 출전 시간 (분)",
+    "Min%": "팀 전체 경기 시간 대비 출전 시간 비율 (%)",
+    "Mn/Start": "선발 출전 시 평균 출전 시간 (분)",
+    "Compl": "풀타임 출전 경기 횟수",
+    "Subs": "교체 출전 횟수",
+    "Mn/Sub": "교체 출전 시 평균 출전 시간 (분)",
+    "unSub": "교체 명단에 있었으나 출전하지 않은 경기 횟수",
+    "Performance": "경기 기록",
+    "Expected": "기대값 지표",
+    "Progression": "전진 관련 지표",
+    "G+A": "득점 + 도움",
+    "G-PK": "페널티킥 제외 득점",
+    "G+A-PK": "페널티킥 제외 득점 + 도움",
+    "npxG+xAG": "페널티킥 제외 기대 득점 + 기대 어시스트",
+    "xG+xAG": "기대 득점 + 기대 어시스트",
+    "Per 90 Minutes": "90분당 기록",
+
+    # 팀 성과 (선수 출전 중)
+    "Team Success": "선수 출전 중 팀 성과",
+    "Team Success (xG)": "선수 출전 중 팀의 기대값 기반 성과",
+    "PPM": "경기당 평균 승점 (Points Per Match)",
+    "onG": "선수가 뛸 때 팀이 기록한 득점",
+    "onGA": "선수가 뛸 때 팀이 허용한 실점",
+    "+/-": "선수가 뛸 때 팀의 골 득실 차 (onG - onGA)",
+    "+/-90": "90분당 골 득실 차",
+    "On-Off": "선수가 뛸 때와 안 뛸 때의 (기대) 득실 차 비교",
+    "onxG": "선수가 뛸 때 팀의 기대 득점",
+    "onxGA": "선수가 뛸 때 팀의 기대 실점",
+    "xG+/-": "기대 득실 차 (onxG - onxGA)",
+    "xG+/-90": "90분당 기대 득실 차",
+
+    # 대회별 기록 (선수 요약 테이블의 접두어)
+    "Premier League": "프리미어리그 기록",
+    "Champions League": "챔피언스리그 기록",
+    "FA Cup": "FA컵 기록",
+    "EFL Cup": "EFL컵 기록",
+    "FA Community Shield": "FA 커뮤니티 실드 기록",
+    "Combined": "모든 대회 통합 기록",
+}
+
+_LOWER = {key.lower(): key for key in LEGEND}
+
+# 질문에서 직접 언급한 용어 (두 글자 이상, 앞뒤가 영문/숫자가 아닌 경우만)
+_QUESTION_TERMS = re.compile(
+    "|".join(
+        rf"(?<![A-Za-z0-9]){re.escape(key)}(?![A-Za-z0-9])"
+        for key in sorted(LEGEND, key=len, reverse=True)
+        if len(key) >= 2
+    )
+)
+_QUESTION_TERMS_ANY_CASE = re.compile(_QUESTION_TERMS.pattern, re.IGNORECASE)
+# 직렬화된 행의 "열 이름: 값" 패턴
+_FIELD_NAMES = re.compile(r"(?:^|[|;]\s*)([^|;:\n\[\]]+?):\s")
+_AGGREGATE = re.compile(r"^\w+\((.+)\)$")
+
+
+def lookup(column):
+    """데이터 열 이름에 해당하는 범례 키 목록 (접두어_이름 형태는 각각 찾는다)."""
+    column = column.strip()
+    match = _AGGREGATE.match(column)
+    if match:
+        column = match.group(1)
+    for candidate in (column, column.replace("_", " ")):
+        key = _LOWER.get(candidate.lower())
+        if key:
+            return [key]
+    if "_" not in column:
+        return []
+    prefix, name = column.rsplit("_", 1)
+    keys = lookup(prefix) + lookup(name)
+    return list(dict.fromkeys(keys))
+
+
+def question_terms(question):
+    """질문에서 언급한 범례 용어 목록 (대소문자 무시, "psxg" → "PSxG")."""
+    return list(dict.fromkeys(_LOWER[term.lower()] for term in _QUESTION_TERMS_ANY_CASE.findall(question)))
+
+
+def context_columns(context):
+    """문맥에 등장한 열 이름 목록 (직렬화된 행 + 정형 질의 결과의 CSV 헤더)."""
+    columns = _FIELD_NAMES.findall(context)
+    lines = context.splitlines()
+    for i, line in enumerate(lines[:-1]):
+        if line.startswith("[정형 질의 결과"):
+            columns.extend(lines[i + 1].split(","))
+    return columns
+
+
+def select_legend(question, context, budget_tokens):
+    """질문/문맥에 등장한 열의 범례만 토큰 예산 안에서 골라 텍스트로 반환한다."""
+    # 질문에서 언급한 용어 → 문맥에 자주 등장한 열 순서
+    keys = list(dict.fromkeys(_QUESTION_TERMS.findall(question)))
+    counts = {}
+    for column in context_columns(context):
+        for key in lookup(column):
+            counts[key] = counts.get(key, 0) + 1
+    keys += sorted((key for key in counts if key not in keys), key=counts.get, reverse=True)
+
+    lines, used = [], 0
+    for key in keys:
+        line = f"{key}: {LEGEND[key]}"
+        cost = count_tokens(line, config.CHAT_MODEL)
+        if used + cost > budget_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
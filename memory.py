@@ -0,0 +1,103 @@
+"""대화 기억: 최근 대화는 토큰 예산 안에서 그대로, 그보다 오래된 대화는 누적 요약으로 프롬프트에 넣는다.
+
+최근 대화가 MEMORY_WINDOW_TOKENS를 넘으면 가장 오래된 턴부터 창에서 빠지고, 빠진 턴만 기존 요약에
+하나씩 합쳐(요약 모델 호출 1번) 요약을 갱신한다. 전체 기록으로 요약을 다시 만들지 않으므로
+50번째 턴에도 프롬프트 크기와 요약 비용이 2번째 턴과 같은 수준으로 유지된다.
+가장 최근 턴은 예산보다 길어도 (답변을 잘라서) 항상 창에 남는다.
+
+    memory = ConversationMemory()                      # 세션마다 하나 (st.session_state.memory)
+    turn = ChatTurn(question, history=memory.messages())
+    ...
+    memory.add(question, full_answer)                  # 창에서 빠진 턴은 백그라운드에서 요약에 합침
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import config
+import resources
+from tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 요약 갱신은 답변을 그린 뒤 백그라운드에서 진행 (다음 질문은 기다리지 않는다)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+
+summary_template = """\
+맨체스터 시티 전술 분석 대화의 누적 요약을 갱신하세요.
+기존 요약에 새 대화 한 턴의 내용을 합쳐, 이후 질문에 필요한 정보(언급된 경기, 상대팀, 선수, 수치, 결론)만
+한국어로 간결하게 남기세요. 요약 외의 설명은 쓰지 마세요.
+
+[기존 요약]
+{summary}
+
+[새 대화]
+질문: {question}
+답변: {answer}
+"""
+
+
+def fold_summary(summary, question, answer, model):
+    """기존 요약에 한 턴을 합친 새 요약."""
+    prompt = summary_template.format(summary=summary or "(없음)", question=question, answer=answer)
+    return model.invoke(prompt).content.strip()
+
+
+class ConversationMemory:
+    def __init__(self, window_tokens=config.MEMORY_WINDOW_TOKENS, model=config.CHAT_MODEL, on_summary=None):
+        self.window_tokens = window_tokens
+        self.model = model
+        self.on_summary = on_summary  # 요약이 갱신될 때 on_summary(요약, 요약된 턴 수) 호출 (기록 저장소 등)
+        self.turns = []             # 창 안의 최근 턴 [(질문, 창에 넣을 답변, 토큰 수, 전체 답변)]
+        self.summary = ""           # 창에서 빠진 턴들의 누적 요약
+        self.summarized_turns = 0
+        self._pending = None        # 진행 중인 요약 갱신 (Future)
+
+    def add(self, question, answer):
+        full_answer = answer
+        tokens = count_tokens(question + answer, self.model)
+        if tokens > self.window_tokens:
+            answer = truncate_tokens(answer, self.window_tokens - count_tokens(question, self.model), self.model)
+            tokens = count_tokens(question + answer, self.model)
+        self.turns.append((question, answer, tokens, full_answer))
+        evicted = []
+        # 방금 추가한 턴은 빼지 않는다
+        while len(self.turns) > 1 and sum(turn[2] for turn in self.turns) > self.window_tokens:
+            question, _, _, full_answer = self.turns.pop(0)
+            evicted.append((question, full_answer))
+        if evicted:
+            self._pending = _executor.submit(self._fold, self._pending, evicted)
+
+    def _fold(self, previous, evicted):
+        # 앞선 갱신이 끝난 뒤 순서대로 합친다
+        if previous is not None:
+            previous.result()
+        for question, answer in evicted:
+            try:
+                self.summary = fold_summary(self.summary, question, answer, resources.get_summary_model())
+            except Exception:
+                # 요약에 실패하면 기존 요약을 유지 (이 턴은 요약에서 빠진다)
+                logger.exception("conversation summary update failed")
+            self.summarized_turns += 1
+        if self.on_summary is not None:
+            self.on_summary(self.summary, self.summarized_turns)
+
+    def restore(self, summary, summarized_turns, turns):
+        """저장된 요약과 그 뒤의 (질문, 답변) 목록으로 이전 세션의 기억을 되살린다."""
+        self.summary = summary
+        self.summarized_turns = summarized_turns
+        for question, answer in turns:
+            self.add(question, answer)
+
+    def messages(self):
+        """프롬프트에 넣을 메시지: [요약] + 최근 턴의 질문/답변.
+
+        요약 갱신은 기다리지 않고 그 시점의 요약을 쓴다 (갱신 중인 턴은 다음 질문부터 반영).
+        """
+        messages = []
+        if self.summary:
+            messages.append(SystemMessage(content=f"[이전 대화 요약]\n{self.summary}"))
+        for question, answer, _, _ in self.turns:
+            messages += [HumanMessage(content=question), AIMessage(content=answer)]
+        return messages
@@ -0,0 +1,78 @@
+"""벡터화된 MMR(Maximal Marginal Relevance) 검색.
+
+fetch_k개 후보를 Chroma에서 임베딩과 함께 한 번에 받아오고, 후보 간 유사도 행렬을 NumPy로
+한 번만 계산한 뒤 "이미 고른 문서와의 최대 유사도"를 누적해 가며 k개를 고른다.
+(fetch_k == k 이면 MMR은 순서만 바꿀 뿐 다양성이 생기지 않으므로 fetch_k는 k보다 충분히 크게 둔다.)
+"""
+from typing import Any, Optional
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def maximal_marginal_relevance(query_embedding, candidate_embeddings, k, lambda_mult=0.5):
+    """후보 중 MMR 순서로 고른 k개의 번호 목록."""
+    candidates = _normalize(np.asarray(candidate_embeddings, dtype=np.float32))
+    if not len(candidates) or k <= 0:
+        return []
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T  # 후보 간 유사도는 한 번만 계산
+
+    selected = []
+    max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    for _ in range(min(k, len(candidates))):
+        redundancy = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
+def mmr_search(vectorstore, query, k=30, fetch_k=100, lambda_mult=0.5, filter=None, collection=None):
+    """Chroma에서 fetch_k개 후보를 가져와 MMR로 k개 Document를 고른다.
+
+    collection을 주면 (예: quantized_index.QuantizedIndex) Chroma 컬렉션 대신 그 색인에서 후보를 가져온다.
+    """
+    query_embedding = vectorstore.embeddings.embed_query(query)
+    result = (collection or vectorstore._collection).query(
+        query_embeddings=[query_embedding],
+        n_results=max(k, fetch_k),
+        where=filter,
+        include=["documents", "metadatas", "embeddings"],
+    )
+    documents, metadatas = result["documents"][0], result["metadatas"][0]
+    if not documents:
+        return []
+    chosen = maximal_marginal_relevance(query_embedding, result["embeddings"][0], k, lambda_mult)
+    return [Document(page_content=documents[i], metadata=metadatas[i] or {}) for i in chosen]
+
+
+class MMRRetriever(BaseRetriever):
+    vectorstore: VectorStore
+    k: int = 30
+    fetch_k: int = 100
+    lambda_mult: float = 0.5
+    filter: Optional[dict] = None
+    collection: Optional[Any] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query, *, run_manager: CallbackManagerForRetrieverRun):
+        return mmr_search(
+            self.vectorstore, query, self.k, self.fetch_k, self.lambda_mult, self.filter, self.collection
+        )
@@ -0,0 +1,298 @@
+"""한 번의 채팅 턴(질문 → 문맥 → 프롬프트 → 스트리밍 답변) 처리.
+
+chatbot_app.py와 벤치마크(bench_latency.py)가 같은 코드를 사용하며, 단계별 소요 시간(초)을
+ChatTurn.timings 에 기록한다.
+
+    turn = ChatTurn(question, history=memory.messages())   # 이전 대화 (memory.py)
+    turn.prepare()                 # route, embedding, answer_cache, structured_query, retrieval, context_pack, format_messages
+    for piece in turn.stream():    # first_token, stream
+        ...
+    turn.finish(full_answer)       # 답변 캐시에 저장
+
+asyncio 버전(aprepare, astream)은 async_pipeline.py에서 공유 이벤트 루프로 실행한다.
+"""
+import asyncio
+import contextlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder
+from langchain_core.messages import SystemMessage
+
+import config
+import query_engine
+import resources
+import router
+from answer_cache import replay
+from context_packer import pack_context
+from legend import select_legend
+from table_spec import SpecSplitter
+
+logger = logging.getLogger(__name__)
+
+# 정형 질의 LLM 호출은 검색과 동시에 진행한다
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="structured-query")
+
+# -------------------------------
+# 1) 시스템 프롬프트
+# -------------------------------
+system_template = """\
+당신은 맨체스터 시티의 수석 전술 분석관입니다.
+펩 과르디올라 감독님을 위한 경기 데이터 및 전술 분석 보고서를 제공합니다.
+2024-2025 시즌 맨체스터 시티 경기 데이터를 바탕으로, 상대팀의 전술 분석과 팀의 경기력을 개선할 수 있는 정보를 제공합니다.
+지금 날짜는 2025년 2월 21일입니다.
+
+펩 과르디올라 감독님의 전술 철학:
+- **점유율 기반 축구 (Positional Play)**
+- **숏패스와 빌드업을 활용한 압박 탈출**
+- **풀백과 중앙 미드필더의 역할 변형 (Invert Fullbacks)**
+- **전방 압박 (High Pressing) 및 카운터프레스**
+- **라인 간 연결을 위한 포지셔닝 최적화**
+- **상대 팀의 대형 변화와 전술적 대응**
+
+당신의 목표:
+1️⃣ **경기 데이터 분석을 통해 경기력 향상을 지원합니다.**
+2️⃣ **상대팀의 전술적 패턴과 약점을 분석하여 제공합니다.**
+3️⃣ **펩 과르디올라 감독님의 철학을 반영한 개선 방향을 제시합니다.**
+4️⃣ **객관적 데이터와 전술적 통찰을 바탕으로 의사결정을 지원합니다.**
+
+📌 **추가 지침**
+- **데이터는 표 형식으로 정리하세요.**
+- **단순 나열이 아닌 전술적 시사점을 포함하세요.**
+- **질문이 모호하면, 추가적인 설명을 요청하세요.**
+- **답변은 한국어로 하세요.
+"""
+
+human_template = """\
+{question}
+
+아래의 문맥을 바탕으로 답변하세요:
+{context}
+
+[범례, 용어 설명]
+{legend}
+
+📊 **출력 방식**
+- 표 형식으로 데이터를 제공하세요.
+- 전술적 의미를 분석하여 추가 설명을 포함하세요.
+- 필요할 경우, 시각적인 비교(예: 상대 팀 vs 맨시티)를 포함하세요.
+"""
+chat_template = ChatPromptTemplate.from_messages([
+    SystemMessage(content=system_template),
+    MessagesPlaceholder("history", optional=True),
+    HumanMessagePromptTemplate.from_template(human_template)
+])
+
+# 표 지정 모드 (config.TABLE_SPEC_ENABLED): 표는 앱이 데이터에서 그리고 모델은 해석만 쓴다 (table_spec.py)
+table_system_template = system_template.replace(
+    "- **데이터는 표 형식으로 정리하세요.**",
+    "- **표는 앱이 원본 데이터에서 직접 그립니다. 표를 지정하는 첫 줄 외에는 표를 쓰지 마세요.**"
+)
+table_human_template = human_template.split("📊")[0] + """📊 **출력 방식**
+- 첫 줄에는 답변에 필요한 표를 아래 형식의 JSON 한 줄로만 지정하세요. 표가 필요 없으면 `TABLE: null`.
+  TABLE: {{"table": "<문맥의 [테이블] 이름>", "join": ["<같은 키를 가진 다른 테이블>"],
+  "filters": [{{"column": "<열>", "op": "==|!=|>|>=|<|<=|in|contains", "value": <값>}}],
+  "group_by": ["<열>"], "metrics": [{{"column": "<열>", "agg": "sum|mean|median|min|max|count"}}],
+  "columns": ["<보여줄 열>"], "sort_by": "<열>", "ascending": false, "limit": 10}}
+- 둘째 줄부터는 숫자를 옮겨 적지 말고, 표를 바탕으로 한 전술적 의미와 해석만 작성하세요.
+- 필요할 경우, 시각적인 비교(예: 상대 팀 vs 맨시티)를 포함하세요.
+"""
+table_chat_template = ChatPromptTemplate.from_messages([
+    SystemMessage(content=table_system_template),
+    MessagesPlaceholder("history", optional=True),
+    HumanMessagePromptTemplate.from_template(table_human_template)
+])
+
+
+# -------------------------------
+# 2) 채팅 턴
+# -------------------------------
+class ChatTurn:
+    def __init__(self, question, history=None):
+        self.question = question
+        self.history = history or []
+        self.timings = {}
+        self.decision = None
+        self.direct_answer = None    # 경로 분류에서 바로 정해진 답변 (범례, 인사, 되묻기)
+        self.embedding = None
+        self.cached_answer = None
+        self.context = None
+        self.context_stats = {}
+        self.messages = None
+        self.rendered_table = None   # 표 지정 모드에서 앱이 그린 표
+        self.model_output = None     # 모델이 실제로 출력한 텍스트 (표 지정 줄 포함)
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def _route(self):
+        # 네트워크 호출 전에 경로를 고른다 (범례/인사/되묻기는 여기서 답변까지 정해짐)
+        with self.timed("route"):
+            if config.ROUTER_ENABLED:
+                self.decision = router.route(
+                    self.question, has_history=bool(self.history), extractor=resources.get_entity_extractor()
+                )
+            else:
+                # 답변 캐시는 질문의 항목(날짜, 상대팀 등)이 같은 답변만 쓰므로 항목은 여기서도 찾는다
+                self.decision = router.RouteDecision(
+                    "auto", "router disabled", entities=resources.get_entity_extractor().extract(self.question)
+                )
+        self.direct_answer = self.decision.answer
+        return self.direct_answer is not None
+
+    def _use_structured_query(self):
+        # 정형 질의 LLM(전체 카탈로그 포함)은 수치/집계 표현이 있는 질문에만 호출한다.
+        # 분류기를 끈 경우에도 같은 규칙으로 먼저 걸러낸다
+        if self.decision.route == "auto":
+            return router.STRUCTURED_RE.search(self.question) is not None
+        return self.decision.route == "structured"
+
+    def _structured_context(self):
+        with self.timed("structured_query"):
+            return query_engine.answer_context(self.question, resources.get_planner_model(), resources.get_tables())
+
+    def prepare(self):
+        """경로 분류 → 답변 캐시 확인 → (캐시에 없으면) 문맥 검색과 프롬프트 생성."""
+        if self._route():
+            return self
+        # 답변 캐시: 데이터가 바뀌지 않았고 비슷한 질문에 이미 답했다면 그대로 사용
+        with self.timed("embedding"):
+            self.embedding = resources.get_embedding_model().embed_query(self.question)
+        if self._use_answer_cache():
+            with self.timed("answer_cache"):
+                self.cached_answer = resources.get_answer_cache().lookup(self.embedding, self.decision.entities)
+        if self.cached_answer is not None:
+            return self
+
+        # 문맥 검색: 수치/집계 질문은 정형 질의를 검색과 동시에 실행하고, 결과가 있으면 그것을 사용
+        planned = _executor.submit(self._structured_context) if self._use_structured_query() else None
+        with self.timed("retrieval"):
+            docs = resources.get_retriever().get_relevant_documents(query=self.question)
+        self.context = planned.result() if planned is not None else None
+        if self.context is None:
+            self._pack(docs)
+        self._format()
+        return self
+
+    async def aprepare(self, limiter=None):
+        """prepare()의 asyncio 버전. 외부 호출(임베딩, 정형 질의, 검색)은 limiter 안에서 실행한다."""
+        limiter = limiter or contextlib.nullcontext()
+        if self._route():
+            return self
+        with self.timed("embedding"):
+            async with limiter:
+                self.embedding = await resources.get_embedding_model().aembed_query(self.question)
+        if self._use_answer_cache():
+            with self.timed("answer_cache"):
+                self.cached_answer = await asyncio.to_thread(
+                    resources.get_answer_cache().lookup, self.embedding, self.decision.entities
+                )
+        if self.cached_answer is not None:
+            return self
+
+        async def structured():
+            if not self._use_structured_query():
+                return None
+            async with limiter:
+                return await asyncio.to_thread(self._structured_context)
+
+        async def retrieve():
+            with self.timed("retrieval"):
+                async with limiter:
+                    return await resources.get_retriever().ainvoke(self.question)
+
+        self.context, docs = await asyncio.gather(structured(), retrieve())
+        if self.context is None:
+            # 문맥 조립/프롬프트 생성은 CPU 작업이므로 루프를 막지 않도록 스레드에서 실행
+            await asyncio.to_thread(self._pack, docs)
+        await asyncio.to_thread(self._format)
+        return self
+
+    def _use_answer_cache(self):
+        # 이전 대화에 기대는 후속 질문("아스날전은?")은 질문만으로 답이 정해지지 않으므로 캐시하지 않는다
+        return config.ANSWER_CACHE_ENABLED and not self.history
+
+    def _pack(self, docs):
+        # 같은 행 조각 병합, 중복 행 제거 후 토큰 예산 안에서 관련도 순으로 채움
+        with self.timed("context_pack"):
+            self.context, self.context_stats = pack_context(docs, config.CONTEXT_TOKEN_BUDGET)
+        logger.info("context packed: %s", self.context_stats)
+
+    def _format(self):
+        # 프롬프트 생성 (범례는 질문/문맥에 등장한 열만 토큰 예산 안에서 포함)
+        template = table_chat_template if config.TABLE_SPEC_ENABLED else chat_template
+        with self.timed("format_messages"):
+            self.messages = template.format_messages(
+                history=self.history,
+                question=self.question,
+                context=self.context,
+                legend=select_legend(self.question, self.context, config.LEGEND_TOKEN_BUDGET)
+            )
+
+    def stream(self):
+        """답변 조각을 차례로 내보낸다 (캐시 적중/바로 정해진 답변은 저장된 답변을 다시 흘려보냄)."""
+        if self.direct_answer is not None or self.cached_answer is not None:
+            yield from replay(self.direct_answer or self.cached_answer)
+            return
+        start = time.perf_counter()
+        first = True
+        splitter = self._splitter()
+        output = []
+        try:
+            for chunk in resources.get_chat_model().stream(self.messages):
+                if first:
+                    self.timings["first_token"] = time.perf_counter() - start
+                    first = False
+                output.append(chunk.content)
+                yield from self._split(splitter, chunk.content)
+        finally:
+            self.model_output = "".join(output)
+        yield from self._split(splitter, None)
+        self.timings["stream"] = time.perf_counter() - start
+
+    async def astream(self, limiter=None):
+        """stream()의 asyncio 버전 (채팅 모델의 astream 사용)."""
+        if self.direct_answer is not None or self.cached_answer is not None:
+            for piece in replay(self.direct_answer or self.cached_answer):
+                yield piece
+            return
+        start = time.perf_counter()
+        first = True
+        splitter = self._splitter()
+        output = []
+        try:
+            async with limiter or contextlib.nullcontext():
+                async for chunk in resources.get_chat_model().astream(self.messages):
+                    if first:
+                        self.timings["first_token"] = time.perf_counter() - start
+                        first = False
+                    output.append(chunk.content)
+                    for piece in self._split(splitter, chunk.content):
+                        yield piece
+        finally:
+            self.model_output = "".join(output)
+        for piece in self._split(splitter, None):
+            yield piece
+        self.timings["stream"] = time.perf_counter() - start
+
+    def _splitter(self):
+        return SpecSplitter(resources.get_tables()) if config.TABLE_SPEC_ENABLED else None
+
+    def _split(self, splitter, piece):
+        """표 지정 모드에서는 첫 줄의 표 지정을 표로 바꿔서, 아니면 조각을 그대로 돌려준다 (None은 스트림 끝)."""
+        if splitter is None:
+            return [piece] if piece is not None else []
+        with self.timed("table_render"):
+            pieces = splitter.feed(piece) if piece is not None else splitter.close()
+        self.rendered_table = splitter.table
+        return pieces
+
+    def finish(self, answer):
+        if self.cached_answer is None and self.direct_answer is None and self._use_answer_cache():
+            resources.get_answer_cache().store(self.question, self.embedding, answer, self.decision.entities)
@@ -0,0 +1,180 @@
+"""임베딩/채팅 모델 백엔드 선택 (config.EMBEDDING_PROVIDER, config.CHAT_PROVIDER).
+
+- openai: OpenAIEmbeddings / ChatOpenAI (기본)
+- local:  네트워크 없이 동작하는 대체 구현. 수집, 검색, UI 루프를 격리된 환경에서
+          부하 테스트/프로파일링할 때 사용한다. 같은 입력에는 항상 같은 결과를 낸다.
+
+    MANCITY_EMBEDDING_PROVIDER=local MANCITY_CHAT_PROVIDER=local python ingest.py
+    MANCITY_EMBEDDING_PROVIDER=local MANCITY_CHAT_PROVIDER=local streamlit run chatbot_app.py
+"""
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import config
+from keyword_index import tokenize
+
+
+# -------------------------------
+# 1) 로컬 임베딩: 단어 + 글자 n-gram 해시 벡터
+# -------------------------------
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dimensions=512, ngram_range=(3, 4)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+
+    def _features(self, text):
+        for word in tokenize(text):
+            yield word
+            padded = f" {word} "
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n]
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+# -------------------------------
+# 2) 로컬 채팅 모델: 정해진 응답을 일정 속도로 스트리밍
+# -------------------------------
+CANNED_RESPONSE = (
+    "로컬 테스트 모델의 응답입니다. 실제 분석 대신 정해진 문장을 스트리밍합니다. "
+    "| 항목 | 값 |\n|---|---|\n| 경기 | 예시 |\n| xG | 1.00 |\n"
+)
+# 표 지정 모드(config.TABLE_SPEC_ENABLED)의 로컬 응답: 첫 줄의 표 지정 + 해석 문장
+CANNED_TABLE_SPEC = (
+    'TABLE: {"table": "mancity_scores_fixtures", "filters": [{"column": "Result", "op": "in", "value": ["W", "D", "L"]}], '
+    '"columns": ["Result", "GF", "GA", "xG", "xGA", "Poss"], "sort_by": "Date", "limit": 5}\n'
+)
+CANNED_COMMENTARY = "로컬 테스트 모델의 응답입니다. 실제 분석 대신 정해진 해석 문장을 스트리밍합니다. "
+
+
+class LocalChatModel(BaseChatModel):
+    response: str = CANNED_RESPONSE
+    prefix: str = ""              # 반복 없이 맨 앞에 한 번만 보내는 조각
+    response_tokens: int = 200
+    first_token_seconds: float = 0.3
+    tokens_per_second: float = 50.0
+
+    @property
+    def _llm_type(self):
+        return "local-canned"
+
+    def _pieces(self):
+        # 응답 문장을 단어 단위로 반복해 response_tokens 개를 만든다
+        words = re.findall(r"\S+\s*|\s+", self.response) or [" "]
+        pieces = [words[i % len(words)] for i in range(self.response_tokens)]
+        return [self.prefix] + pieces if self.prefix else pieces
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_seconds)
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, piece in enumerate(self._pieces()):
+            if i and interval:
+                time.sleep(interval)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # 스레드를 잡지 않도록 asyncio.sleep으로 같은 속도를 흉내 낸다
+        await asyncio.sleep(self.first_token_seconds)
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, piece in enumerate(self._pieces()):
+            if i and interval:
+                await asyncio.sleep(interval)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+# -------------------------------
+# 3) 설정에 따른 생성
+# -------------------------------
+def make_embeddings():
+    if config.EMBEDDING_PROVIDER == "local":
+        return HashingEmbeddings(dimensions=config.LOCAL_EMBEDDING_DIMENSIONS)
+    if config.EMBEDDING_PROVIDER != "openai":
+        raise ValueError(f"unknown embedding provider: {config.EMBEDDING_PROVIDER}")
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=config.EMBEDDING_MODEL)
+
+
+def _local_chat(**overrides):
+    options = {
+        "response_tokens": config.LOCAL_CHAT_RESPONSE_TOKENS,
+        "first_token_seconds": config.LOCAL_CHAT_FIRST_TOKEN_SECONDS,
+        "tokens_per_second": config.LOCAL_CHAT_TOKENS_PER_SECOND,
+    }
+    return LocalChatModel(**{**options, **overrides})
+
+
+def make_chat_model():
+    if config.CHAT_PROVIDER == "local":
+        if config.TABLE_SPEC_ENABLED:
+            return _local_chat(prefix=CANNED_TABLE_SPEC, response=CANNED_COMMENTARY)
+        return _local_chat()
+    if config.CHAT_PROVIDER != "openai":
+        raise ValueError(f"unknown chat provider: {config.CHAT_PROVIDER}")
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model_name=config.CHAT_MODEL, temperature=config.CHAT_TEMPERATURE, streaming=True)
+
+
+def make_planner_model():
+    # 정형 질의 변환용 (스트리밍 없이 JSON만 받는다). 로컬 모델은 항상 "정형 질의 아님"
+    if config.CHAT_PROVIDER == "local":
+        return _local_chat(response='{"table":null}', response_tokens=1, first_token_seconds=0.0, tokens_per_second=0)
+    if config.CHAT_PROVIDER != "openai":
+        raise ValueError(f"unknown chat provider: {config.CHAT_PROVIDER}")
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model_name=config.CHAT_MODEL,
+        temperature=0,
+        model_kwargs={"response_format": {"type": "json_object"}}
+    )
+
+
+def make_summary_model():
+    # 지난 대화 요약용 (memory.py). 요약 길이는 max_tokens로 제한한다
+    if config.CHAT_PROVIDER == "local":
+        return _local_chat(response="이전 대화 요약 (로컬 테스트 모델). ", response_tokens=8, first_token_seconds=0.0)
+    if config.CHAT_PROVIDER != "openai":
+        raise ValueError(f"unknown chat provider: {config.CHAT_PROVIDER}")
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model_name=config.CHAT_MODEL, temperature=0, max_tokens=config.MEMORY_SUMMARY_TOKENS)
@@ -0,0 +1,237 @@
+"""차원 축소 + 양자화 벡터 색인 (선택 검색 백엔드).
+
+chroma_db_10의 3072차원 float32 벡터를 그대로 두고, 그 옆에 작은 색인을 따로 만든다.
+
+1) 차원 축소: truncate(앞 N차원만 사용 후 재정규화; text-embedding-3 계열의 `dimensions` 옵션과
+   같은 방식이라 다시 임베딩할 필요가 없다) 또는 pca(저장된 벡터로 학습한 투영)
+2) 저장: float16 또는 int8 (벡터별 scale)
+3) 검색: 축소/양자화 벡터로 후보 rescore개를 고른 뒤, memory-map한 원본(float32)으로 다시 점수를 매긴다.
+
+    python quantized_index.py build --reduce truncate --dimensions 512 --dtype int8
+    python quantized_index.py report --k 10 --queries 200
+
+MANCITY_VECTOR_BACKEND=quantized 로 두면 Retriever가 Chroma 대신 이 색인에서 후보를 가져온다.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import config
+from keyword_index import matches_where
+
+INDEX_DIR = os.path.join(config.PERSIST_DIRECTORY, "quantized")
+DTYPES = {"float16": np.float16, "int8": np.int8}
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# -------------------------------
+# 1) 차원 축소 / 양자화
+# -------------------------------
+def fit_projection(vectors, reduce, dimensions):
+    """(mean, components) 를 반환한다. truncate는 투영 없이 앞 N차원을 쓴다 (None)."""
+    if reduce == "truncate":
+        return None
+    if reduce != "pca":
+        raise ValueError(f"unknown reduce mode: {reduce}")
+    mean = vectors.mean(axis=0)
+    # 특이값 분해로 상위 N개 주성분
+    _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+    return mean.astype(np.float32), vt[:dimensions].T.astype(np.float32)
+
+
+def reduce_vectors(vectors, dimensions, projection=None):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if projection is None:
+        reduced = vectors[:, :dimensions]
+    else:
+        mean, components = projection
+        reduced = (vectors - mean) @ components
+    return _normalize(reduced)
+
+
+def quantize(vectors, dtype):
+    """(양자화 벡터, 벡터별 scale 또는 None)"""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scale = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(vectors / scale).astype(np.int8), scale.astype(np.float32)
+
+
+# -------------------------------
+# 2) 색인
+# -------------------------------
+class QuantizedIndex:
+    def __init__(self, path=INDEX_DIR):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.options = meta["options"]
+        self.ids, self.documents, self.metadatas = meta["ids"], meta["documents"], meta["metadatas"]
+        self.vectors = np.load(os.path.join(path, "vectors.npy"))
+        self.scale = np.load(os.path.join(path, "scale.npy")) if self.options["dtype"] == "int8" else None
+        self.projection = None
+        if self.options["reduce"] == "pca":
+            self.projection = (np.load(os.path.join(path, "pca_mean.npy")), np.load(os.path.join(path, "pca_components.npy")))
+        # 원본은 디스크에 두고 후보 행만 읽는다
+        self.full = np.load(os.path.join(path, "full.npy"), mmap_mode="r")
+
+    def memory_bytes(self):
+        scale = self.scale.nbytes if self.scale is not None else 0
+        projection = sum(a.nbytes for a in self.projection) if self.projection else 0
+        return self.vectors.nbytes + scale + projection
+
+    def _coarse_scores(self, query):
+        reduced = reduce_vectors(query, self.options["dimensions"], self.projection)[0]
+        if self.scale is not None:
+            return (self.vectors @ reduced.astype(np.float32)) * self.scale[:, 0]
+        return self.vectors.astype(np.float32) @ reduced
+
+    def search(self, query_embedding, n_results, where=None, rescore=None):
+        """(문서 번호 배열, 원본 벡터 기준 코사인 점수 배열), 점수 내림차순."""
+        scores = self._coarse_scores(query_embedding)
+        if where:
+            mask = np.fromiter((matches_where(m, where) for m in self.metadatas), dtype=bool, count=len(self.metadatas))
+            scores = np.where(mask, scores, -np.inf)
+        available = int(np.isfinite(scores).sum())
+        pool = min(max(n_results, rescore or self.options["rescore"]), available)
+        if pool <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        candidates = np.sort(np.argpartition(-scores, pool - 1)[:pool])  # 정렬해 두면 mmap 읽기가 순차적
+
+        # 원본 float32 벡터로 다시 점수 계산
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        exact = _normalize(np.asarray(self.full[candidates], dtype=np.float32)) @ query
+        order = np.argsort(-exact)[:n_results]
+        return candidates[order], exact[order]
+
+    def query(self, query_embeddings, n_results=10, where=None, include=("documents", "metadatas")):
+        """Chroma collection.query와 같은 형태의 결과 (mmr.mmr_search에서 그대로 사용)."""
+        result = {"ids": [], "documents": [], "metadatas": [], "embeddings": [], "distances": []}
+        for embedding in query_embeddings:
+            rows, scores = self.search(embedding, n_results, where)
+            result["ids"].append([self.ids[i] for i in rows])
+            result["documents"].append([self.documents[i] for i in rows])
+            result["metadatas"].append([self.metadatas[i] for i in rows])
+            result["embeddings"].append(np.asarray(self.full[rows], dtype=np.float32) if "embeddings" in include else None)
+            result["distances"].append((1 - scores).tolist())
+        return result
+
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def load_index(path=INDEX_DIR):
+    """meta.json이 바뀌었을 때만 다시 읽는다 (build는 meta.json을 마지막에 쓴다)."""
+    mtime = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+    with _load_lock:
+        if _loaded.get(path, (None,))[0] != mtime:
+            _loaded[path] = (mtime, QuantizedIndex(path))
+        return _loaded[path][1]
+
+
+class LatestIndex:
+    """질의할 때마다 load_index로 최신 색인을 쓰는 collection (Retriever는 한 번 만들어 계속 쓰므로)."""
+    def __init__(self, path=INDEX_DIR):
+        self.path = path
+
+    def current(self):
+        return load_index(self.path)
+
+    def query(self, *args, **kwargs):
+        return self.current().query(*args, **kwargs)
+
+
+def build(db, path=INDEX_DIR, reduce="truncate", dimensions=512, dtype="int8", rescore=100):
+    """Chroma 컬렉션의 원본 벡터로 축소/양자화 색인을 만든다."""
+    if dtype not in DTYPES:
+        raise ValueError(f"unknown dtype: {dtype}")
+    data = db.get(include=["documents", "metadatas", "embeddings"])
+    full = np.asarray(data["embeddings"], dtype=np.float32)
+    dimensions = min(dimensions, full.shape[1])
+    projection = fit_projection(full, reduce, dimensions)
+    vectors, scale = quantize(reduce_vectors(full, dimensions, projection), dtype)
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "full.npy"), full)
+    np.save(os.path.join(path, "vectors.npy"), vectors)
+    if scale is not None:
+        np.save(os.path.join(path, "scale.npy"), scale)
+    if projection is not None:
+        np.save(os.path.join(path, "pca_mean.npy"), projection[0])
+        np.save(os.path.join(path, "pca_components.npy"), projection[1])
+    options = {"reduce": reduce, "dimensions": dimensions, "dtype": dtype, "rescore": rescore,
+               "source_dimensions": int(full.shape[1])}
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"options": options, "ids": data["ids"], "documents": data["documents"],
+                   "metadatas": data["metadatas"]}, f, ensure_ascii=False)
+    return QuantizedIndex(path)
+
+
+# -------------------------------
+# 3) 비교 리포트
+# -------------------------------
+def report(index, k=10, queries=200, seed=0):
+    """저장된 벡터 일부를 질의로 사용해 원본 전수 검색 대비 recall@k, 지연 시간, 메모리를 비교한다."""
+    full = _normalize(np.asarray(index.full, dtype=np.float32))
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(full), size=min(queries, len(full)), replace=False)
+    # 문서 벡터에 약간의 잡음을 더해 질문처럼 사용
+    probes = _normalize(full[sample] + rng.normal(scale=0.01, size=(len(sample), full.shape[1])).astype(np.float32))
+
+    def timed(fn):
+        start = time.perf_counter()
+        results = [fn(probe) for probe in probes]
+        return results, (time.perf_counter() - start) / len(probes) * 1000
+
+    exact, full_ms = timed(lambda q: np.argsort(-(full @ q))[:k])
+    coarse, coarse_ms = timed(lambda q: np.argsort(-index._coarse_scores(q))[:k])
+    rescored, rescored_ms = timed(lambda q: index.search(q, k)[0])
+
+    def recall_at_k(results):
+        return float(np.mean([len(set(r) & set(e)) / k for r, e in zip(results, exact)]))
+
+    return {
+        "options": index.options,
+        "documents": len(full),
+        "memory_mb": {"full_float32": full.nbytes / 2**20, "quantized": index.memory_bytes() / 2**20},
+        "latency_ms": {"full_float32": full_ms, "quantized": coarse_ms, "quantized_rescored": rescored_ms},
+        f"recall@{k}": {"quantized": recall_at_k(coarse), "quantized_rescored": recall_at_k(rescored)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="차원 축소/양자화 벡터 색인을 만들고 원본과 비교합니다.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Chroma 컬렉션에서 색인 생성 후 리포트")
+    build_parser.add_argument("--reduce", choices=["truncate", "pca"], default="truncate")
+    build_parser.add_argument("--dimensions", type=int, default=512)
+    build_parser.add_argument("--dtype", choices=sorted(DTYPES), default="int8")
+    build_parser.add_argument("--rescore", type=int, default=config.QUANTIZED_RESCORE, help="원본 벡터로 다시 점수를 매길 후보 수")
+    for p in (build_parser, sub.add_parser("report", help="기존 색인 리포트")):
+        p.add_argument("--k", type=int, default=10)
+        p.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        import resources
+
+        index = build(resources.get_vectorstore(), reduce=args.reduce, dimensions=args.dimensions,
+                      dtype=args.dtype, rescore=args.rescore)
+    else:
+        index = QuantizedIndex()
+    print(json.dumps(report(index, args.k, args.queries), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""집계/수치 질문을 위한 정형 질의 엔진.
+
+"4-2-3-1 상대로 평균 xG", "홀란드의 90분당 득점" 같은 질문은 LLM이 질문을 작은 JSON 질의(QuerySpec)로
+바꾸고, 실제 계산은 datastore 테이블(pandas)에서 수행한다. LLM에는 계산된 결과만 전달된다.
+
+    {"table": "mancity_scores_fixtures",
+     "filters": [{"column": "Opp Formation", "op": "==", "value": "4-2-3-1"}],
+     "metrics": [{"column": "xG", "agg": "mean"}]}
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MATCH_KEYS = ["Date", "Opponent"]
+PLAYER_KEYS = ["Player"]
+
+AGGREGATIONS = {"sum", "mean", "median", "min", "max", "count"}
+
+OPERATORS = {
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    "in": lambda s, v: s.isin(v if isinstance(v, list) else [v]),
+    "contains": lambda s, v: s.astype(str).str.contains(str(v), case=False, regex=False),
+}
+
+
+class QueryError(ValueError):
+    pass
+
+
+@dataclass
+class QuerySpec:
+    table: str
+    join: list = field(default_factory=list)
+    filters: list = field(default_factory=list)
+    group_by: list = field(default_factory=list)
+    metrics: list = field(default_factory=list)
+    columns: list = field(default_factory=list)
+    sort_by: str = None
+    ascending: bool = False
+    limit: int = 20
+
+    @classmethod
+    def from_dict(cls, data):
+        known = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in data.items() if key in known and value is not None})
+
+
+def table_keys(frame):
+    if all(key in frame.columns for key in MATCH_KEYS):
+        return MATCH_KEYS
+    if all(key in frame.columns for key in PLAYER_KEYS):
+        return PLAYER_KEYS
+    return []
+
+
+# -------------------------------
+# 1) 질의 실행
+# -------------------------------
+def _get_table(tables, name):
+    if name not in tables:
+        raise QueryError(f"unknown table: {name}")
+    return tables[name]
+
+
+def _join(frame, tables, names):
+    keys = table_keys(frame)
+    for name in names:
+        other = _get_table(tables, name)
+        if table_keys(other) != keys or not keys:
+            raise QueryError(f"cannot join {name}: key columns differ")
+        extra = [c for c in other.columns if c not in frame.columns]
+        frame = frame.merge(other[keys + extra], on=keys, how="left")
+    return frame
+
+
+def _coerce(series, value):
+    if isinstance(value, list):
+        return [_coerce(series, v) for v in value]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Timestamp(value)
+    # LLM이 숫자를 문자열("2")로 쓰는 경우
+    if pd.api.types.is_numeric_dtype(series) and isinstance(value, str):
+        try:
+            return float(value.replace(",", ""))
+        except ValueError:
+            raise QueryError(f"not a number for {series.name}: {value}") from None
+    return value
+
+
+def _column(frame, name):
+    if name not in frame.columns:
+        raise QueryError(f"unknown column: {name}")
+    return frame[name]
+
+
+def execute(spec, tables):
+    """QuerySpec을 실행해 결과 DataFrame을 반환한다."""
+    frame = _join(_get_table(tables, spec.table), tables, spec.join)
+
+    for condition in spec.filters:
+        series = _column(frame, condition["column"])
+        op = condition.get("op", "==")
+        if op not in OPERATORS:
+            raise QueryError(f"unknown operator: {op}")
+        frame = frame[OPERATORS[op](series, _coerce(series, condition.get("value")))]
+
+    if spec.metrics:
+        aggregations = {}
+        for metric in spec.metrics:
+            column, agg = metric["column"], metric.get("agg", "mean")
+            if agg not in AGGREGATIONS:
+                raise QueryError(f"unknown aggregation: {agg}")
+            _column(frame, column)
+            aggregations[f"{agg}({column})"] = (column, agg)
+        if spec.group_by:
+            for column in spec.group_by:
+                _column(frame, column)
+            result = frame.groupby(spec.group_by, dropna=False).agg(**aggregations).reset_index()
+            result.insert(len(spec.group_by), "rows", frame.groupby(spec.group_by, dropna=False).size().values)
+        else:
+            result = pd.DataFrame({name: [frame[column].agg(agg)] for name, (column, agg) in aggregations.items()})
+            result.insert(0, "rows", len(frame))
+    else:
+        columns = list(dict.fromkeys(table_keys(frame) + list(spec.columns)))
+        for column in columns:
+            _column(frame, column)
+        result = frame[columns] if columns else frame
+
+    if spec.sort_by:
+        result = result.sort_values(_column(result, spec.sort_by).name, ascending=spec.ascending)
+    return result.head(spec.limit).reset_index(drop=True)
+
+
+def format_result(frame, digits=2):
+    """결과 표를 프롬프트에 넣을 CSV 텍스트로 만든다."""
+    numeric = frame.select_dtypes("number").columns
+    return frame.round({column: digits for column in numeric}).to_csv(index=False, date_format="%Y-%m-%d")
+
+
+# -------------------------------
+# 2) 질문 → QuerySpec (LLM)
+# -------------------------------
+def catalog(tables):
+    lines = []
+    for name, frame in tables.items():
+        keys = table_keys(frame)
+        kind = "경기별" if keys == MATCH_KEYS else "선수별" if keys == PLAYER_KEYS else "기타"
+        lines.append(f"- {name} ({kind}): {', '.join(frame.columns)}")
+    return "\n".join(lines)
+
+
+PLANNER_TEMPLATE = """\
+당신은 축구 데이터 질의 변환기입니다. 질문이 아래 테이블에서 필터/그룹/집계로 정확히 답할 수 있는
+수치 질문이면 JSON 질의 하나로 바꾸고, 아니면 {{"table": null}} 만 출력하세요. JSON 외에는 출력하지 마세요.
+
+테이블 (맨체스터 시티 2024-2025 시즌):
+{catalog}
+
+JSON 형식:
+{{"table": "<테이블>", "join": ["<같은 키를 가진 다른 테이블>"],
+  "filters": [{{"column": "<열>", "op": "==|!=|>|>=|<|<=|in|contains", "value": <값>}}],
+  "group_by": ["<열>"], "metrics": [{{"column": "<열>", "agg": "sum|mean|median|min|max|count"}}],
+  "columns": ["<집계 없이 보여줄 열>"], "sort_by": "<열 또는 agg(열)>", "ascending": false, "limit": 20}}
+
+질문: {question}
+"""
+
+
+def _parse_json(text):
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+
+
+def plan_query(question, model, tables):
+    """질문을 QuerySpec으로 바꾼다. 정형 질의로 답할 수 없는 질문이면 None."""
+    response = model.invoke(PLANNER_TEMPLATE.format(catalog=catalog(tables), question=question))
+    data = _parse_json(response.content)
+    if not isinstance(data, dict) or not data.get("table"):
+        return None
+    return QuerySpec.from_dict(data)
+
+
+def answer_context(question, model, tables):
+    """정형 질의 결과를 문맥 텍스트로 반환한다. 해당하지 않거나 실패하면 None (검색 문맥을 사용)."""
+    try:
+        spec = plan_query(question, model, tables)
+    except Exception:
+        # 네트워크 오류, 요청 한도 초과 등: 이 턴은 검색 결과로 답한다
+        logger.exception("query planner failed")
+        return None
+    if spec is None:
+        return None
+    try:
+        result = execute(spec, tables)
+    except (QueryError, KeyError, TypeError, ValueError) as e:
+        logger.warning("structured query failed (%s): %s", e, spec)
+        return None
+    return f"[정형 질의 결과: {spec.table}]\n{format_result(result)}"
@@ -0,0 +1,175 @@
+"""프로세스 전체에서 공유하는 리소스 (임베딩 클라이언트, ChromaDB, Retriever, 채팅 모델).
+
+임베딩/채팅 모델의 실제 구현(OpenAI 또는 로컬)은 providers.py에서 설정에 따라 고른다.
+
+Streamlit은 위젯 조작/채팅 턴마다 스크립트를 다시 실행하지만, import된 모듈은
+프로세스에 그대로 남아 있으므로 여기서 만든 객체는 모든 세션이 재사용한다.
+"""
+import functools
+import logging
+import threading
+import time
+
+from langchain.vectorstores import Chroma
+
+import analytics
+import config
+import datastore
+import providers
+import answer_cache
+from embedding_cache import CachedQueryEmbeddings
+from entities import EntityExtractor, FilteredRetriever
+from history_store import HistoryStore
+from keyword_index import HybridRetriever, load_index
+from mmr import MMRRetriever
+from quantized_index import INDEX_DIR as QUANTIZED_INDEX_DIR, LatestIndex
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+
+
+def _shared(factory):
+    # 동시에 여러 세션이 처음 접근해도 한 번만 생성되도록 잠금 후 캐시
+    cache = {}
+
+    @functools.wraps(factory)
+    def wrapper():
+        if "value" not in cache:
+            with _lock:
+                if "value" not in cache:
+                    cache["value"] = factory()
+        return cache["value"]
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+
+@_shared
+def get_embedding_model():
+    # 질문 임베딩은 메모리 LRU → 디스크 캐시를 거친다 (문서 임베딩은 그대로 통과)
+    return CachedQueryEmbeddings(
+        providers.make_embeddings(),
+        model_name=config.EMBEDDING_MODEL,
+        path=config.QUERY_CACHE_PATH,
+        max_entries=config.QUERY_CACHE_SIZE
+    )
+
+
+@_shared
+def get_vectorstore():
+    return Chroma(
+        persist_directory=config.PERSIST_DIRECTORY,
+        embedding_function=get_embedding_model()
+    )
+
+
+@_shared
+def get_entity_extractor():
+    # 선수/상대팀/대회/날짜 사전 (질문 → metadata 필터)
+    return EntityExtractor.from_tables(get_tables())
+
+
+@_shared
+def get_vector_backend():
+    # None이면 Chroma 컬렉션을 그대로 사용, quantized면 축소/양자화 색인 (quantized_index.py build로 생성)
+    # 색인은 meta.json이 바뀔 때마다 다시 읽는다 (ingest가 다시 만들어도 재시작 불필요)
+    if config.VECTOR_BACKEND == "quantized":
+        backend = LatestIndex(QUANTIZED_INDEX_DIR)
+        backend.current()  # 색인이 없으면 여기서 바로 실패
+        return backend
+    return None
+
+
+@_shared
+def get_retriever():
+    return build_retriever(config.RETRIEVER_K, config.RETRIEVER_FETCH_K, config.RETRIEVER_LAMBDA_MULT)
+
+
+def build_retriever(k, fetch_k, lambda_mult):
+    """검색 파라미터별 Retriever를 만든다 (sweep_retrieval.py에서도 사용)."""
+    mmr_options = {"k": k, "fetch_k": fetch_k, "lambda_mult": lambda_mult, "collection": get_vector_backend()}
+    extractor = get_entity_extractor() if config.ENTITY_FILTER_ENABLED else None
+    if extractor is not None:
+        # 질문에 나온 선수/상대팀 등으로 후보를 좁힌 뒤 MMR 검색
+        retriever = FilteredRetriever(vectorstore=get_vectorstore(), extractor=extractor, **mmr_options)
+    else:
+        retriever = MMRRetriever(vectorstore=get_vectorstore(), **mmr_options)
+    if not config.HYBRID_ENABLED:
+        return retriever
+    # 키워드 색인을 먼저 확인하고, 필요할 때만 벡터 검색과 합친다
+    return HybridRetriever(
+        vector_retriever=retriever,
+        k=k,
+        keyword_k=config.HYBRID_KEYWORD_K,
+        rrf_k=config.HYBRID_RRF_K,
+        exact_max_df=config.HYBRID_EXACT_MAX_DF,
+        extractor=extractor
+    )
+
+
+@_shared
+def get_chat_model():
+    return providers.make_chat_model()
+
+
+@_shared
+def get_planner_model():
+    # 정형 질의 변환용 (스트리밍 없이 JSON만 받는다)
+    return providers.make_planner_model()
+
+
+@_shared
+def get_summary_model():
+    # 대화 기록 요약용 (memory.py)
+    return providers.make_summary_model()
+
+
+@_shared
+def get_answer_cache():
+    return answer_cache.AnswerCache(config.ANSWER_CACHE_PATH, threshold=config.ANSWER_CACHE_THRESHOLD)
+
+
+@_shared
+def get_history_store():
+    return HistoryStore(config.HISTORY_DB_PATH)
+
+
+@_shared
+def get_tables():
+    # data/*.csv 를 정리한 테이블 + 수집 때 미리 계산한 분석 뷰(analytics.py) {이름: DataFrame}
+    return {**datastore.load_all(), **analytics.load_views()}
+
+
+@_shared
+def warm_up():
+    """모든 공유 리소스를 미리 생성하고 단계별 소요 시간(초)을 반환한다."""
+    timings = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = time.perf_counter() - start
+
+    timed("embedding_model", get_embedding_model)
+    timed("vectorstore", get_vectorstore)
+    timed("tables", get_tables)
+    timed("entity_extractor", get_entity_extractor)
+    timed("vector_backend", get_vector_backend)
+    timed("retriever", get_retriever)
+    timed("keyword_index", load_index)
+    timed("chat_model", get_chat_model)
+    timed("planner_model", get_planner_model)
+    timed("summary_model", get_summary_model)
+    timed("answer_cache", get_answer_cache)
+    timed("history_store", get_history_store)
+    if config.WARMUP_QUERY:
+        # 실제 검색 한 번으로 HTTP 연결과 HNSW 세그먼트를 미리 열어둔다
+        timed("warmup_query", lambda: get_vectorstore().similarity_search(config.WARMUP_QUERY, k=1))
+    timings["total"] = sum(timings.values())
+
+    logger.info(
+        "startup warm-up: %s",
+        ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+    )
+    return timings
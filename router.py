@@ -0,0 +1,120 @@
+"""질문 경로 분류기 (네트워크 호출 없이 규칙으로 판단).
+
+모든 질문에 임베딩 → 검색 → 정형 질의 LLM → 답변 LLM 을 거치지 않도록, 먼저 질문을 보고 경로를 고른다.
+
+- legend:     "PSxG 뜻이 뭐야?" → 범례(legend.LEGEND)에서 바로 답변 (LLM 없음)
+- smalltalk:  인사/감사 → 정해진 답변 (LLM 없음)
+- clarify:    "분석해줘"처럼 대상이 없는 질문 → 질문 예시와 함께 되묻기 (LLM 없음)
+- structured: 평균/합계/순위 같은 수치 질문 → 정형 질의를 검색과 함께 실행, 정형 결과가 있으면 사용
+- rag:        그 외 → 정형 질의 LLM을 건너뛰고 바로 검색
+
+    decision = route("PSxG 뜻이 뭐야?", extractor=resources.get_entity_extractor())
+    decision.route, decision.answer     # "legend", "**PSxG**: 슈팅 후 기대 실점 ..."
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+
+from legend import LEGEND, question_terms
+
+logger = logging.getLogger(__name__)
+
+# 용어 정의를 묻는 표현
+DEFINITION_RE = re.compile(
+    r"뜻|의미|정의|무슨 ?말|뭐야|뭔가요|뭐예요|뭐에요|무엇|뭘까|약자|설명해|이란|란\?|"
+    r"\bmeans?\b|\bmeaning\b|\bwhat (is|does|are)\b|\bdefin",
+    re.IGNORECASE
+)
+# 집계/비교/순위처럼 표에서 계산해야 하는 질문
+STRUCTURED_RE = re.compile(
+    r"평균|합계|총합|누적|몇 ?(골|경기|번|개|회|명|분)|가장|최다|최소|최고|최저|제일|순위|랭킹|상위|하위|"
+    r"비율|퍼센트|%|90분당|승률|득점왕|도움왕|이상|이하|넘은|많은|적은|"
+    r"\btop ?\d*\b|\bper ?90\b|\baverage\b|\btotal\b|\bmost\b|\bhow many\b",
+    re.IGNORECASE
+)
+# 용어 + 정의 표현 외에 남아도 되는 말 (조사, 어미, 부호)
+DEFINITION_FILLER_RE = re.compile(
+    r"(무슨|어떤|혹시|그럼|그러면|좀|용어|지표|please|the|a|stand|for)?"
+    r"(이란|이에요|인가요|예요|에요|가요|나요|주세요|줘|이|가|은|는|의|란|를|을|요|야|죠|냐|니)*[?!.~,]*",
+    re.IGNORECASE
+)
+# 인사/감사만으로 이루어진 메시지 ("하이프레스"처럼 다른 단어의 일부는 제외)
+_GREETING = (
+    r"(안녕(하세요|하십니까)?|하이|헬로|반가워요?|반갑습니다|ㅎㅇ|고마워요?|고맙습니다|감사(해요|합니다)?|땡큐|"
+    r"수고(하세요|하셨습니다|했어요?)?|잘 ?가(요|세요)?|바이|ㅋ+|ㅎ+|hi|hello|hey|thanks|thank you|bye)"
+)
+SMALLTALK_RE = re.compile(rf"^{_GREETING}([\s,.!?~^]*{_GREETING})*[\s,.!?~^]*$", re.IGNORECASE)
+# 대상 없이 이것만 있으면 무엇을 분석할지 되묻는다
+VAGUE_WORDS = re.compile(r"분석|해줘|해 ?주세요|알려줘|알려 ?주세요|어때|어떄|설명|정리|요약|좀|그냥|뭐|\?|!|\.")
+
+SMALLTALK_ANSWER = (
+    "안녕하세요! 맨체스터 시티 2024-2025 시즌 경기·선수 데이터를 바탕으로 전술 분석을 도와드립니다.\n\n"
+    "예) \"아스널전 xG와 점유율 비교\", \"홀란드 90분당 득점\", \"4-2-3-1 상대로 성적\""
+)
+THANKS_ANSWER = "도움이 되었다니 다행입니다. 다른 경기나 선수에 대해서도 물어봐 주세요."
+CLARIFY_ANSWER = (
+    "어떤 경기나 선수, 지표를 분석할지 조금 더 알려주세요.\n\n"
+    "예) \"리버풀전 패배 원인\", \"최근 5경기 폼 추이\", \"도쿠의 드리블 성공률\", \"PSxG 뜻\""
+)
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    reason: str
+    answer: str = None                       # LLM 없이 바로 보낼 답변 (legend, smalltalk, clarify)
+    terms: list = field(default_factory=list)
+    entities: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def legend_answer(terms):
+    return "\n".join(f"**{term}**: {LEGEND[term]}" for term in terms)
+
+
+def without_terms(text, terms):
+    """질문에서 범례 용어를 지운 나머지 ("Cmp%"의 %가 집계 표현으로 잡히지 않도록)."""
+    for term in sorted(terms, key=len, reverse=True):
+        text = re.sub(rf"(?<![A-Za-z0-9]){re.escape(term)}(?![A-Za-z0-9])", " ", text, flags=re.IGNORECASE)
+    return text
+
+
+def is_definition_only(text, terms):
+    """질문이 용어와 정의 표현("뜻이 뭐야", "what is")만으로 이루어졌는지.
+
+    "최근 5경기 xG 추이가 뭐야?"처럼 기간, 숫자, 다른 단어가 남으면 데이터를 묻는 질문이다.
+    """
+    rest = DEFINITION_RE.sub(" ", without_terms(text, terms))
+    return all(DEFINITION_FILLER_RE.fullmatch(word) for word in rest.split())
+
+
+def _classify(question, has_history, extractor):
+    text = question.strip()
+    terms = question_terms(text)
+    entities = extractor.extract(text) if extractor is not None else {}
+
+    # 수치/집계 표현이 있으면 용어가 있어도 데이터 질문 ("이번 시즌 평균 xG가 뭐야?")
+    if STRUCTURED_RE.search(without_terms(text, terms)):
+        return RouteDecision("structured", "aggregate wording", None, terms, entities)
+    if terms and not entities and DEFINITION_RE.search(text) and is_definition_only(text, terms):
+        return RouteDecision("legend", "definition question", legend_answer(terms), terms, entities)
+    if not terms and not entities and SMALLTALK_RE.search(text):
+        thanks = re.search(r"고마|고맙|감사|땡큐|수고|thank", text, re.IGNORECASE)
+        return RouteDecision("smalltalk", "greeting", THANKS_ANSWER if thanks else SMALLTALK_ANSWER, terms, entities)
+    # 이전 대화가 있으면 짧은 후속 질문("그럼 아스널전은?")도 문맥으로 이해할 수 있다
+    if not has_history and not terms and not entities and len(re.sub(r"\s", "", VAGUE_WORDS.sub("", text))) < 2:
+        return RouteDecision("clarify", "no subject", CLARIFY_ANSWER, terms, entities)
+    return RouteDecision("rag", "default", None, terms, entities)
+
+
+def route(question, has_history=False, extractor=None):
+    """질문의 경로를 고르고 결정과 소요 시간을 로그에 남긴다."""
+    start = time.perf_counter()
+    decision = _classify(question, has_history, extractor)
+    decision.seconds = time.perf_counter() - start
+    logger.info(
+        "route=%s reason=%s terms=%s entities=%s (%.2fms)",
+        decision.route, decision.reason, decision.terms, sorted(decision.entities), decision.seconds * 1000
+    )
+    return decision
@@ -0,0 +1,60 @@
+"""CSV 행(row)을 임베딩/프롬프트용 한 줄 텍스트로 바꾸는 직렬화.
+
+    [mancity_shooting] 2024-08-18 vs Chelsea | Comp: Premier League; Venue: Away; Sh: 18; ...
+    [Standard Stats] Erling Haaland | Nation: NOR; Pos: FW; Age: 24; ...
+
+값이 없는 열은 빼고, 행의 키(날짜/상대팀 또는 선수)와 원본 테이블 이름을 앞에 붙인다.
+한 행은 항상 하나의 문서가 되며 중간에서 잘리지 않는다.
+"""
+# 직렬화 형식이 바뀌면 올려서 수집 시 모든 파일을 다시 반영하게 한다
+SERIALIZER_VERSION = 3
+
+# 검색 필터용 metadata로 올리는 열 (골 기록의 Scorer는 Player로 저장). 바뀌면 올린다
+METADATA_FIELDS = ("Date", "Opponent", "Comp", "Venue", "Player", "Pos")
+METADATA_VERSION = 1
+
+MISSING_VALUES = {"", "null", "nan", "none"}
+
+
+def is_missing(value):
+    # None, NaN, NaT
+    if value is None or value != value:
+        return True
+    return isinstance(value, str) and value.strip().lower() in MISSING_VALUES
+
+
+def format_value(value):
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def row_key(row):
+    """행을 식별하는 (키 문자열, 키로 사용한 열 목록)을 반환한다."""
+    if not is_missing(row.get("Date")) and not is_missing(row.get("Opponent")):
+        return f"{format_value(row['Date'])} vs {format_value(row['Opponent'])}", ("Date", "Opponent")
+    if not is_missing(row.get("Player")):
+        return format_value(row["Player"]), ("Player",)
+    return "", ()
+
+
+def row_metadata(row):
+    """행의 주요 필드를 Chroma metadata(dict, 문자열 값)로 만든다. 값이 없는 필드는 뺀다."""
+    row = dict(row)
+    if is_missing(row.get("Player")) and not is_missing(row.get("Scorer")):
+        row["Player"] = row["Scorer"]
+    return {field: format_value(row[field]) for field in METADATA_FIELDS if not is_missing(row.get(field))}
+
+
+def serialize_row(table, row):
+    """dict 형태의 행을 한 줄 텍스트로 만든다."""
+    key, key_columns = row_key(row)
+    fields = "; ".join(
+        f"{column}: {format_value(value)}"
+        for column, value in row.items()
+        if column not in key_columns and not is_missing(value)
+    )
+    header = f"[{table}] {key}".rstrip()
+    return f"{header} | {fields}" if fields else header
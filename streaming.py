@@ -0,0 +1,51 @@
+"""스트리밍 답변을 일정 간격으로 모아서 화면에 그리는 렌더러.
+
+조각마다 전체 답변을 다시 markdown으로 보내면 답변 길이에 비례한 작업이 조각 수만큼 반복된다.
+조각은 리스트에 모아 두고, 마지막 갱신 후 interval_ms가 지났거나 쌓인 글자가 max_chars를 넘을 때만
+화면을 갱신하며, close()에서 마지막으로 전체 답변을 한 번 더 그린다.
+
+    renderer = ThrottledRenderer(st.empty())
+    for piece in stream:
+        renderer.write(piece)
+    full_answer = renderer.close()
+"""
+import time
+
+import config
+
+
+class ThrottledRenderer:
+    def __init__(self, placeholder, interval_ms=config.STREAM_FLUSH_INTERVAL_MS,
+                 max_chars=config.STREAM_FLUSH_CHARS, cursor="▌"):
+        self.placeholder = placeholder
+        self.interval = interval_ms / 1000
+        self.max_chars = max_chars
+        self.cursor = cursor
+        self.text = ""        # 화면에 반영된 답변
+        self._pending = []    # 아직 반영하지 않은 조각
+        self._pending_chars = 0
+        self._last_flush = time.perf_counter()
+        self.flushes = 0
+
+    def write(self, piece):
+        if not piece:
+            return
+        self._pending.append(piece)
+        self._pending_chars += len(piece)
+        if self._pending_chars >= self.max_chars or time.perf_counter() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self, final=False):
+        if self._pending:
+            self.text += "".join(self._pending)
+            self._pending.clear()
+            self._pending_chars = 0
+        # 스트리밍 중에는 커서를 붙여 진행 중임을 표시
+        self.placeholder.markdown(self.text if final else self.text + self.cursor)
+        self._last_flush = time.perf_counter()
+        self.flushes += 1
+
+    def close(self):
+        """남은 조각까지 반영해 최종 답변을 그리고 전체 텍스트를 반환한다."""
+        self.flush(final=True)
+        return self.text
@@ -0,0 +1,111 @@
+"""검색 파라미터(k, fetch_k, lambda_mult) 조합별 지연 시간과 recall을 측정하는 명령.
+
+    python sweep_retrieval.py
+    python sweep_retrieval.py --k 5 10 20 30 --fetch-k 50 100 200 --lambda 0.5 0.8 --json sweep.json
+
+정답 세트(bench/golden_questions.jsonl)의 각 질문에는 검색되어야 하는 행의 metadata 조건이 있다.
+recall = 조건을 만족하는 문서가 하나라도 검색된 비율. 질문 임베딩은 첫 반복에서 캐시되므로
+측정되는 지연 시간은 검색(필터, 키워드 색인, 벡터 검색, MMR) 단계다.
+"""
+import argparse
+import itertools
+import json
+import logging
+import statistics
+import time
+
+import config
+import resources
+
+GOLDEN_PATH = "./bench/golden_questions.jsonl"
+
+
+def load_golden(path=GOLDEN_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def recall(docs, expected):
+    """expected 조건(metadata 부분 일치) 중 검색 결과로 충족된 비율."""
+    if not expected:
+        return 1.0
+    hits = sum(
+        any(all(doc.metadata.get(key) == value for key, value in condition.items()) for doc in docs)
+        for condition in expected
+    )
+    return hits / len(expected)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def evaluate(retriever, golden, repeat=3):
+    latencies, recalls = [], []
+    for item in golden:
+        retriever.invoke(item["question"])  # 질문 임베딩 캐시 워밍업
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = retriever.invoke(item["question"])
+            latencies.append(time.perf_counter() - start)
+        recalls.append(recall(docs, item["expected"]))
+    return {
+        "recall": statistics.mean(recalls),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+def sweep(ks, fetch_ks, lambdas, golden, repeat=3):
+    results = []
+    for k, fetch_k, lambda_mult in itertools.product(ks, fetch_ks, lambdas):
+        if fetch_k < k:
+            continue
+        retriever = resources.build_retriever(k, fetch_k, lambda_mult)
+        row = {"k": k, "fetch_k": fetch_k, "lambda_mult": lambda_mult, **evaluate(retriever, golden, repeat)}
+        print(
+            f"k={k:>3} fetch_k={fetch_k:>4} lambda={lambda_mult:.2f}  "
+            f"recall={row['recall']:.3f}  p50={row['p50_ms']:.1f}ms  p95={row['p95_ms']:.1f}ms"
+        )
+        results.append(row)
+    return results
+
+
+def recommend(results, tolerance):
+    """최고 recall과의 차이가 tolerance 이내인 설정 중 k가 가장 작고, 그중 가장 빠른 설정."""
+    best = max(row["recall"] for row in results)
+    candidates = [row for row in results if row["recall"] >= best - tolerance]
+    return min(candidates, key=lambda row: (row["k"], row["p50_ms"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검색 파라미터별 지연 시간과 recall을 측정합니다.")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="정답 세트 (JSONL)")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 15, 20, 30])
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[30, 60, 100, 200])
+    parser.add_argument("--lambda", dest="lambdas", type=float, nargs="+", default=[0.5, 0.8, 1.0])
+    parser.add_argument("--repeat", type=int, default=3, help="질문별 반복 측정 횟수")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="추천 시 허용할 recall 감소폭")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    golden = load_golden(args.golden)
+    results = sweep(args.k, args.fetch_k, args.lambdas, golden, args.repeat)
+    if not results:
+        parser.error("fetch_k >= k 인 조합이 없습니다")
+
+    best = recommend(results, args.tolerance)
+    print(
+        f"✅ 추천: MANCITY_RETRIEVER_K={best['k']} MANCITY_RETRIEVER_FETCH_K={best['fetch_k']} "
+        f"MANCITY_RETRIEVER_LAMBDA_MULT={best['lambda_mult']} "
+        f"(recall={best['recall']:.3f}, p50={best['p50_ms']:.1f}ms, 현재 k={config.RETRIEVER_K})"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "recommended": best}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
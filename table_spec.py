@@ -0,0 +1,101 @@
+"""표 지정(table spec) 모드: 표는 데이터에서 직접 그리고, 모델은 해석만 스트리밍한다.
+
+모델이 숫자를 문맥에서 markdown 표로 옮겨 적으면 답변 토큰 대부분이 표에 쓰이고 숫자가 틀릴 수도 있다.
+이 모드에서는 모델이 답변 첫 줄에 정형 질의(query_engine.QuerySpec)와 같은 형식의 JSON을 쓰고,
+앱이 그 질의를 data/*.csv 테이블(과 분석 뷰)에서 실행해 표를 그린 뒤 나머지 해석을 이어서 보여준다.
+
+    TABLE: {"table": "mancity_scores_fixtures", "filters": [{"column": "Opponent", "op": "==", "value": "Arsenal"}],
+            "columns": ["Result", "GF", "GA", "xG", "xGA", "Poss"], "limit": 5}
+    아스널전 두 경기 모두 ...
+
+    splitter = SpecSplitter(resources.get_tables())
+    for piece in model_pieces:
+        yield from splitter.feed(piece)     # 첫 줄이 끝나면 [표 markdown, 나머지 조각]
+    yield from splitter.close()
+"""
+import json
+import logging
+
+import config
+from query_engine import QueryError, QuerySpec, execute
+from serialize import format_value, is_missing
+
+logger = logging.getLogger(__name__)
+
+SPEC_PREFIX = "TABLE:"
+
+
+def to_markdown(frame, digits=2):
+    """DataFrame을 markdown 표로 만든다 (숫자는 digits 자리로 반올림, 빈 값은 빈 칸)."""
+    numeric = frame.select_dtypes("number").columns
+    frame = frame.round({column: digits for column in numeric})
+
+    def cell(value):
+        return "" if is_missing(value) else format_value(value).replace("|", "\\|")
+
+    lines = [
+        "| " + " | ".join(str(column) for column in frame.columns) + " |",
+        "|" + "---|" * len(frame.columns),
+    ]
+    lines += ["| " + " | ".join(cell(value) for value in row) + " |" for row in frame.itertuples(index=False)]
+    return "\n".join(lines)
+
+
+def render(line, tables, max_rows=config.TABLE_SPEC_MAX_ROWS):
+    """'TABLE: {...}' 한 줄을 실행해 (QuerySpec, markdown 표)를 반환한다. 표가 없거나 실패하면 (spec, None)."""
+    text = line.strip()[len(SPEC_PREFIX):].strip()
+    if not text or text == "null":
+        return None, None
+    try:
+        spec = QuerySpec.from_dict(json.loads(text))
+        spec.limit = min(int(spec.limit), max_rows)
+        result = execute(spec, tables)
+    except (json.JSONDecodeError, QueryError, KeyError, TypeError, ValueError) as e:
+        logger.warning("table spec failed (%s): %s", e, text)
+        return None, None
+    if result.empty:
+        return spec, None
+    return spec, to_markdown(result)
+
+
+class SpecSplitter:
+    """모델 출력 조각에서 첫 줄의 표 지정을 떼어 내 표로 바꾸고, 나머지는 그대로 흘려보낸다."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.spec = None
+        self.table = None       # 앱이 그린 markdown 표 (없으면 None)
+        self._buffer = ""
+        self._done = False
+
+    def feed(self, piece):
+        if self._done:
+            return [piece] if piece else []
+        self._buffer += piece
+        head = self._buffer.lstrip()
+        if "\n" in head:
+            line, rest = head.split("\n", 1)
+            return self._resolve(line, rest)
+        # 첫 줄이 표 지정으로 시작하지 않는 게 확실하면 기다리지 않고 내보낸다
+        if head and not (head.startswith(SPEC_PREFIX) or SPEC_PREFIX.startswith(head)):
+            return self._resolve(None, self._buffer)
+        return []
+
+    def close(self):
+        """스트림이 끝났을 때 남은 버퍼를 처리한다 (표 지정 한 줄만 온 경우 등)."""
+        if self._done:
+            return []
+        head = self._buffer.lstrip()
+        if head.startswith(SPEC_PREFIX):
+            return self._resolve(head, "")
+        return self._resolve(None, self._buffer)
+
+    def _resolve(self, line, rest):
+        self._done = True
+        if line is None or not line.strip().startswith(SPEC_PREFIX):
+            text = rest if line is None else f"{line}\n{rest}"
+            return [text] if text else []
+        self.spec, self.table = render(line, self.tables)
+        pieces = [self.table + "\n\n"] if self.table else []
+        rest = rest.lstrip("\n")
+        return pieces + ([rest] if rest else [])
@@ -0,0 +1,26 @@
+"""테스트 공통 설정: 네트워크 없이 로컬 백엔드를 쓰고, 저장 경로는 모두 임시 디렉터리로 돌린다.
+
+config는 import 시점에 환경 변수를 읽으므로 테스트 모듈보다 먼저 설정한다.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TMP = tempfile.mkdtemp(prefix="mancity-tests-")
+
+os.environ.update({
+    "MANCITY_EMBEDDING_PROVIDER": "local",
+    "MANCITY_CHAT_PROVIDER": "local",
+    "MANCITY_PERSIST_DIRECTORY": os.path.join(_TMP, "chroma"),
+    "MANCITY_QUERY_CACHE_PATH": os.path.join(_TMP, "query_embeddings.sqlite"),
+    "MANCITY_ANSWER_CACHE_PATH": os.path.join(_TMP, "answers.sqlite"),
+    "MANCITY_HISTORY_DB_PATH": os.path.join(_TMP, "chat_history.sqlite"),
+    "MANCITY_TRACE_LOG_PATH": "",
+    "MANCITY_WARMUP_QUERY": "",
+    "MANCITY_LOCAL_CHAT_FIRST_TOKEN_SECONDS": "0",
+    "MANCITY_LOCAL_CHAT_TOKENS_PER_SECOND": "0",
+})
+# data/ 경로가 상대 경로이므로 저장소 루트에서 실행한다
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
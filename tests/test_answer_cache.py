@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import answer_cache
+import config
+from answer_cache import AnswerCache
+
+
+@pytest.fixture
+def data_version(monkeypatch):
+    version = {"value": "data1"}
+    monkeypatch.setattr(answer_cache.ingest, "data_version", lambda: version["value"])
+    return version
+
+
+def vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_processes_with_different_settings_keep_each_others_answers(tmp_path, monkeypatch, data_version):
+    path = str(tmp_path / "answers.sqlite")
+    app, api = AnswerCache(path, 0.95), AnswerCache(path, 0.95)
+
+    monkeypatch.setattr(config, "TABLE_SPEC_ENABLED", False)
+    app.store("맨유전 결과", vector(1, 0), "일반 답변")
+    monkeypatch.setattr(config, "TABLE_SPEC_ENABLED", True)
+    api.store("맨유전 결과", vector(1, 0), "표 지정 답변")
+    assert api.lookup(vector(1, 0)) == "표 지정 답변"
+
+    monkeypatch.setattr(config, "TABLE_SPEC_ENABLED", False)
+    assert app.lookup(vector(1, 0)) == "일반 답변"
+    monkeypatch.setattr(config, "TABLE_SPEC_ENABLED", True)
+    assert api.lookup(vector(1, 0)) == "표 지정 답변"
+
+
+def test_new_data_version_prunes_old_answers(tmp_path, data_version):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite"), 0.95)
+    cache.store("맨유전 결과", vector(1, 0), "이전 답변")
+    assert cache.lookup(vector(1, 0)) == "이전 답변"
+
+    data_version["value"] = "data2"
+    assert cache.lookup(vector(1, 0)) is None
+    count = cache._connect().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+    assert count == 0
+
+
+def test_zero_vector_never_hits(tmp_path, data_version):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite"), 0.95)
+    cache.store("빈 질문", vector(0, 0), "답변")
+    assert cache.lookup(vector(0, 0)) is None
+
+
+def test_questions_differing_only_by_date_do_not_share_answers(tmp_path, data_version):
+    import resources
+
+    extractor = resources.get_entity_extractor()
+    first, second = "2024-08-18 경기 결과", "2024-08-24 경기 결과"
+    assert extractor.extract(first) != extractor.extract(second)
+
+    cache = AnswerCache(str(tmp_path / "answers.sqlite"), 0.95)
+    # 임베딩이 거의 같아도 (코사인 유사도 ≥ 0.95) 날짜가 다르면 다른 질문이다
+    cache.store(first, vector(1, 0), "첼시전 2-0 승리", extractor.extract(first))
+    assert cache.lookup(vector(1, 0.01), extractor.extract(second)) is None
+    assert cache.lookup(vector(1, 0.01), extractor.extract(first)) == "첼시전 2-0 승리"
+    assert cache.lookup(vector(1, 0.01)) is None
+
+
+def test_rows_from_before_entities_are_not_reused(tmp_path, data_version):
+    import sqlite3
+
+    path = str(tmp_path / "answers.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE answers (id INTEGER PRIMARY KEY AUTOINCREMENT, question TEXT NOT NULL, "
+            "embedding BLOB NOT NULL, answer TEXT NOT NULL, version TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO answers (question, embedding, answer, version, created_at) VALUES (?, ?, ?, ?, 0)",
+            ("맨유전 결과", vector(1, 0).tobytes(), "이전 답변", answer_cache.current_version(2))
+        )
+    cache = AnswerCache(path, 0.95)
+    assert cache.lookup(vector(1, 0)) is None
+    cache.store("맨유전 결과", vector(1, 0), "새 답변")
+    assert cache.lookup(vector(1, 0)) == "새 답변"
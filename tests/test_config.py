@@ -0,0 +1,18 @@
+import pytest
+
+from config import _flag
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", True), ("true", True), ("on", True), ("yes", True),
+    ("0", False), ("false", False), ("OFF", False), (" no ", False),
+])
+def test_flag_values(monkeypatch, value, expected):
+    monkeypatch.setenv("MANCITY_TEST_FLAG", value)
+    assert _flag("MANCITY_TEST_FLAG", not expected) is expected
+
+
+@pytest.mark.parametrize("default", [True, False])
+def test_flag_default_when_unset(monkeypatch, default):
+    monkeypatch.delenv("MANCITY_TEST_FLAG", raising=False)
+    assert _flag("MANCITY_TEST_FLAG", default) is default
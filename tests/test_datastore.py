@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import datastore
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_bom_and_trailing_empty_column(tmp_path):
+    columns = datastore.parse_csv(write(tmp_path / "table.csv", "﻿Player,Min,\nRodri,90,\n"))
+    assert list(columns) == ["Player", "Min"]
+    assert columns["Min"].tolist() == [90.0]
+
+
+def test_thousands_separator_and_missing_values(tmp_path):
+    columns = datastore.parse_csv(write(tmp_path / "table.csv", 'Attendance,Notes\n"2,250",null\n"78,146",\n'))
+    assert columns["Attendance"].tolist() == [2250.0, 78146.0]
+    assert columns["Notes"].tolist() == ["", ""]
+
+
+def test_shootout_score_is_split(tmp_path):
+    columns = datastore.parse_csv(write(tmp_path / "table.csv", "GF,GA\n1 (7),1 (6)\n2,0\n"))
+    assert columns["GF"].tolist() == [1.0, 2.0]
+    assert columns["GF_Shootout"][0] == 7.0
+    assert np.isnan(columns["GF_Shootout"][1])
+    assert columns["GA_Shootout"][0] == 6.0
+
+
+def test_dates_and_non_breaking_spaces(tmp_path):
+    columns = datastore.parse_csv(write(tmp_path / "table.csv", "Date,Opponent\n2024-08-18,Man\xa0City\n,Chelsea\n"))
+    assert columns["Date"].dtype.kind == "M"
+    assert str(columns["Date"][0]) == "2024-08-18"
+    assert np.isnat(columns["Date"][1])
+    assert columns["Opponent"].tolist() == ["Man City", "Chelsea"]
+
+
+def test_excel_date_header_is_restored(tmp_path):
+    columns = datastore.parse_csv(write(tmp_path / "table.csv", "Player,01월 03일\nRodri,1\n"))
+    assert "1/3" in columns
+
+
+def test_duplicate_headers_get_prefixes(tmp_path):
+    header = "Cmp,Att,Cmp%,Cmp,Att,Cmp%,Cmp,Att,Cmp%,Cmp,Att,Cmp%"
+    columns = datastore.parse_csv(write(tmp_path / "mancity_passing.csv", f"{header}\n{','.join(['1'] * 12)}\n"))
+    assert list(columns)[:4] == ["Total_Cmp", "Total_Att", "Total_Cmp%", "Short_Cmp"]
+    assert list(columns)[-1] == "Long_Cmp%"
+
+
+def test_goalkeeping_groups_are_prefixed(tmp_path):
+    header = "GA,GA,Cmp,Att,Cmp%,Att (GK),Thr,Launch%,AvgLen,Att,Launch%,AvgLen,Opp,Stp,Stp%,#OPA,AvgDist"
+    path = write(tmp_path / "mancity_goalkeeping.csv", f"{header}\n{','.join(['1'] * 17)}\n")
+    assert list(datastore.parse_csv(path)) == [
+        "GA", "Performance_GA", "Launched_Cmp", "Launched_Att", "Launched_Cmp%", "Passes_Att (GK)", "Passes_Thr",
+        "Passes_Launch%", "Passes_AvgLen", "Goal Kicks_Att", "Goal Kicks_Launch%", "Goal Kicks_AvgLen",
+        "Crosses_Opp", "Crosses_Stp", "Crosses_Stp%", "Sweeper_#OPA", "Sweeper_AvgDist",
+    ]
+
+
+def test_other_duplicates_get_numbered(tmp_path):
+    columns = datastore.parse_csv(write(tmp_path / "table.csv", "Min,Min\n1,2\n"))
+    assert list(columns) == ["Min", "Min_2"]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(datastore, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(datastore, "STORE_DIR", str(tmp_path / ".store"))
+    return tmp_path
+
+
+def test_load_table_builds_store_and_rebuilds_on_change(data_dir):
+    write(data_dir / "store_table.csv", "Player,Gls,Date\nRodri,1,2024-08-18\nFoden,,2024-08-24\n")
+    frame = datastore.load_table("store_table")
+    assert (data_dir / ".store" / "store_table" / "meta.json").exists()
+    assert frame["Player"].tolist() == ["Rodri", "Foden"]
+    assert frame["Gls"].iloc[0] == 1.0 and pd.isna(frame["Gls"].iloc[1])
+    assert frame["Date"].iloc[1] == pd.Timestamp("2024-08-24")
+
+    write(data_dir / "store_table.csv", "Player,Gls,Date\nRodri,3,2024-08-18\n")
+    assert datastore.load_table("store_table")["Gls"].tolist() == [3.0]
@@ -0,0 +1,86 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedQueryEmbeddings, DiskTier, cache_key, normalize_query
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+        self.async_calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 1.0]
+
+    async def aembed_query(self, text):
+        self.async_calls.append(text)
+        return [float(len(text)), 2.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def test_normalized_questions_share_a_key():
+    assert normalize_query("  Haaland\u3000 골  ") == "haaland 골"
+    assert cache_key("model", "Haaland 골") == cache_key("model", " haaland  골 ")
+    assert cache_key("model", "Haaland 골") != cache_key("other-model", "Haaland 골")
+
+
+def test_memory_lru_evicts_least_recently_used(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedQueryEmbeddings(inner, "model", str(tmp_path / "q.sqlite"), max_entries=2)
+
+    cache.embed_query("a")
+    cache.embed_query("bb")
+    cache.embed_query("a")        # a가 최근 사용으로 올라감
+    cache.embed_query("ccc")      # bb가 밀려남
+
+    assert list(cache._memory) == [cache_key("model", "a"), cache_key("model", "ccc")]
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 3}
+    # 메모리에서 빠진 질문은 디스크에서 찾는다
+    cache.embed_query("bb")
+    assert cache.stats["disk_hits"] == 1
+    assert inner.calls == ["a", "bb", "ccc"]
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "q.sqlite")
+    first = CachedQueryEmbeddings(CountingEmbeddings(), "model", path)
+    first.embed_query("맨유전 결과")
+
+    inner = CountingEmbeddings()
+    second = CachedQueryEmbeddings(inner, "model", path)
+    assert second.embed_query("맨유전 결과") == [6.0, 1.0]
+    assert inner.calls == []
+    assert second.stats["disk_hits"] == 1
+    assert second.hit_rate() == 1.0
+
+
+def test_disk_tier_round_trips_float32(tmp_path):
+    disk = DiskTier(str(tmp_path / "q.sqlite"))
+    disk.put("key", [0.5, -1.25])
+    assert disk.get("key") == [0.5, -1.25]
+    assert disk.get("missing") is None
+
+
+def test_documents_are_not_cached(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedQueryEmbeddings(inner, "model", str(tmp_path / "q.sqlite"))
+    cache.embed_documents(["a", "a"])
+    assert inner.calls == ["a", "a"]
+    assert cache.stats["misses"] == 0
+
+
+def test_aembed_query_uses_async_client_and_cache(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedQueryEmbeddings(inner, "model", str(tmp_path / "q.sqlite"))
+
+    first = asyncio.run(cache.aembed_query("맨유전 결과"))
+    second = asyncio.run(cache.aembed_query("맨유전  결과"))
+
+    assert first == second == [6.0, 2.0]
+    assert inner.async_calls == ["맨유전 결과"]
+    assert inner.calls == []
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
@@ -0,0 +1,63 @@
+import pytest
+
+import config
+import datastore
+import ingest
+import resources
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(datastore, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(datastore, "STORE_DIR", str(tmp_path / ".store"))
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", str(tmp_path / "ingest_manifest.json"))
+    monkeypatch.setattr(ingest, "INDEX_PATH", str(tmp_path / "keyword_index.json"))
+    monkeypatch.setattr(config, "ANALYTICS_ENABLED", False)
+    return tmp_path
+
+
+def write_wages(path, rows):
+    path.write_text("Player,Pos,Weekly Wages\n" + "".join(f"{p},{pos},{w}\n" for p, pos, w in rows), encoding="utf-8")
+
+
+def stored(path):
+    return resources.get_vectorstore().get(where={"source": str(path)}, include=["documents"])["documents"]
+
+
+def test_unchanged_file_is_skipped(data_dir):
+    path = data_dir / "ingest_skip_wages.csv"
+    write_wages(path, [("Erling Haaland", "FW", "£ 375000"), ("Rodri", "MF", "£ 220000")])
+
+    first = ingest.run(files=[str(path)])
+    second = ingest.run(files=[str(path)])
+
+    assert (first["added"], first["skipped"]) == (2, 0)
+    assert (second["added"], second["deleted"], second["skipped"]) == (0, 0, 1)
+    assert len(stored(path)) == 2
+
+
+def test_changed_row_is_replaced_and_others_kept(data_dir):
+    path = data_dir / "ingest_incremental_wages.csv"
+    write_wages(path, [("Erling Haaland", "FW", "£ 375000"), ("Rodri", "MF", "£ 220000")])
+    ingest.run(files=[str(path)])
+
+    write_wages(path, [("Erling Haaland", "FW", "£ 400000"), ("Rodri", "MF", "£ 220000")])
+    stats = ingest.run(files=[str(path)])
+
+    assert (stats["added"], stats["deleted"], stats["skipped"]) == (1, 1, 0)
+    assert stats["embedding"]["rows"] == 1
+    documents = stored(path)
+    assert len(documents) == 2
+    assert any("400000" in text for text in documents)
+    assert not any("375000" in text for text in documents)
+
+
+def test_file_dropped_from_list_is_deleted(data_dir):
+    path = data_dir / "ingest_removed_wages.csv"
+    write_wages(path, [("Phil Foden", "MF", "£ 225000")])
+    ingest.run(files=[str(path)])
+
+    stats = ingest.run(files=[])
+
+    assert stats["deleted"] == 1
+    assert stored(path) == []
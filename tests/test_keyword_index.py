@@ -0,0 +1,65 @@
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from entities import EntityExtractor
+from keyword_index import HybridRetriever, KeywordIndex, matches_where
+
+ROWS = [
+    ("Date: 2023-10-29 | Opponent: Manchester Utd | Result: W 3-0", {"source": "fixtures", "Opponent": "Manchester Utd"}),
+    ("Date: 2024-03-03 | Opponent: Manchester Utd | Result: W 3-1", {"source": "fixtures", "Opponent": "Manchester Utd"}),
+    ("Player: Erling Haaland | Opponent: Manchester Utd | Goal", {"source": "goal_logs", "Player": "Erling Haaland", "Opponent": "Manchester Utd"}),
+    ("Player: Erling Haaland | Gls: 27 | Sh: 120", {"source": "shooting", "Player": "Erling Haaland"}),
+    ("Date: 2023-10-08 | Opponent: Arsenal | Result: L 0-1", {"source": "fixtures", "Opponent": "Arsenal"}),
+    ("Player: Phil Foden | Gls: 19 | Sh: 90", {"source": "shooting", "Player": "Phil Foden"}),
+]
+
+
+class StaticRetriever(BaseRetriever):
+    # 벡터 검색 대신 고정된 결과를 돌려준다 (호출 횟수 기록)
+    documents: List[Document]
+    calls: int = 0
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.calls += 1
+        return self.documents
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    path = str(tmp_path / "keyword_index.json")
+    KeywordIndex([str(i) for i in range(len(ROWS))], [text for text, _ in ROWS], [meta for _, meta in ROWS]).save(path)
+    extractor = EntityExtractor({
+        "Player": {"Erling Haaland", "Phil Foden"}, "Opponent": {"Manchester Utd", "Arsenal"},
+    })
+    vector = StaticRetriever(documents=[Document(page_content=ROWS[3][0], metadata=ROWS[3][1])])
+    return HybridRetriever(vector_retriever=vector, index_path=path, k=4, exact_max_df=0.5, extractor=extractor)
+
+
+def test_single_entity_group_uses_exact_matches(retriever):
+    docs = retriever.invoke("맨유전 결과")
+    assert {d.metadata["source"] for d in docs} <= {"fixtures", "goal_logs"}
+    assert all(d.metadata["Opponent"] == "Manchester Utd" for d in docs)
+    assert retriever.vector_retriever.calls == 0
+
+
+def test_player_and_match_groups_fuse_vector_results(retriever):
+    assert retriever._identifier_terms("홀란드 맨유전 득점") == []
+    docs = retriever.invoke("Erling Haaland Manchester Utd goal")
+    assert retriever.vector_retriever.calls == 1
+    # 골 기록만이 아니라 맨유전 경기 결과와 선수 시즌 기록(벡터 결과)도 함께 나온다
+    assert {"fixtures", "goal_logs", "shooting"} <= {d.metadata["source"] for d in docs}
+
+
+def test_multiple_values_in_one_field_use_common_terms(retriever):
+    assert retriever._identifier_terms("홀란드 포든 득점") == []
+    assert retriever._identifier_terms("맨유전 결과") == ["manchester", "utd"]
+
+
+def test_matches_where():
+    metadata = {"Player": "Erling Haaland", "Opponent": "Manchester Utd"}
+    assert matches_where(metadata, {"Player": {"$in": ["Erling Haaland"]}})
+    assert not matches_where(metadata, {"$and": [{"Player": {"$in": ["Phil Foden"]}}, {"Opponent": {"$in": ["Manchester Utd"]}}]})
+    assert matches_where(metadata, {"$or": [{"Player": {"$in": ["Phil Foden"]}}, {"Opponent": {"$in": ["Manchester Utd"]}}]})
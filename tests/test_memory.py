@@ -0,0 +1,114 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import config
+import resources
+from memory import ConversationMemory
+from tokens import count_tokens
+
+
+class FakeSummaryModel:
+    # 프롬프트의 새 대화 질문을 기존 요약 뒤에 붙인다 (호출 순서 확인용)
+    def __init__(self, fail_on=None):
+        self.prompts = []
+        self.fail_on = fail_on
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        summary = prompt.split("[기존 요약]\n")[1].split("\n")[0]
+        question = prompt.split("질문: ")[1].split("\n")[0]
+        if question == self.fail_on:
+            raise RuntimeError("summary model down")
+        return SimpleNamespace(content=question if summary == "(없음)" else f"{summary} / {question}")
+
+
+@pytest.fixture
+def summary_model(monkeypatch):
+    model = FakeSummaryModel()
+    monkeypatch.setattr(resources, "get_summary_model", lambda: model)
+    return model
+
+
+def turn_tokens(question, answer):
+    return count_tokens(question + answer, config.CHAT_MODEL)
+
+
+def wait(conversation):
+    if conversation._pending is not None:
+        conversation._pending.result(timeout=5)
+
+
+def test_oldest_turns_leave_window_and_fold_in_order(summary_model):
+    turns = [(f"질문{i}", "답변 " * 10) for i in range(4)]
+    window = turn_tokens(*turns[0]) * 2
+    saved = []
+    conversation = ConversationMemory(window_tokens=window, on_summary=lambda s, n: saved.append((s, n)))
+    for question, answer in turns:
+        conversation.add(question, answer)
+    wait(conversation)
+
+    assert [turn[0] for turn in conversation.turns] == ["질문2", "질문3"]
+    assert conversation.summary == "질문0 / 질문1"
+    assert conversation.summarized_turns == 2
+    assert saved[-1] == ("질문0 / 질문1", 2)
+    # 창에서 빠진 턴마다 요약 모델을 한 번씩 호출하고, 전체 답변을 넘긴다
+    assert len(summary_model.prompts) == 2
+    assert "답변: " + turns[0][1] in summary_model.prompts[0]
+
+
+def test_messages_put_summary_before_recent_turns(summary_model):
+    conversation = ConversationMemory(window_tokens=turn_tokens("질문0", "답변") + 1)
+    conversation.add("질문0", "답변")
+    conversation.add("질문1", "답변")
+    wait(conversation)
+
+    messages = conversation.messages()
+    assert isinstance(messages[0], SystemMessage) and "질문0" in messages[0].content
+    assert messages[1:] == [HumanMessage(content="질문1"), AIMessage(content="답변")]
+
+
+def test_latest_turn_is_kept_and_truncated(summary_model):
+    conversation = ConversationMemory(window_tokens=20)
+    long_answer = "맨체스터 시티 " * 200
+    conversation.add("질문", long_answer)
+
+    assert len(conversation.turns) == 1
+    question, answer, tokens, full_answer = conversation.turns[0]
+    assert tokens <= 20 and len(answer) < len(long_answer)
+    assert full_answer == long_answer
+    assert conversation._pending is None
+
+
+def test_failed_summary_keeps_previous_summary(monkeypatch):
+    model = FakeSummaryModel(fail_on="질문1")
+    monkeypatch.setattr(resources, "get_summary_model", lambda: model)
+    conversation = ConversationMemory(window_tokens=turn_tokens("질문0", "답변") + 1)
+    for i in range(4):
+        conversation.add(f"질문{i}", "답변")
+    wait(conversation)
+
+    assert conversation.summary == "질문0 / 질문2"
+    assert conversation.summarized_turns == 3
+
+
+def test_messages_do_not_wait_for_summary(monkeypatch):
+    release = threading.Event()
+
+    class SlowModel(FakeSummaryModel):
+        def invoke(self, prompt):
+            release.wait(5)
+            return super().invoke(prompt)
+
+    monkeypatch.setattr(resources, "get_summary_model", lambda: SlowModel())
+    conversation = ConversationMemory(window_tokens=turn_tokens("질문0", "답변") + 1)
+    conversation.add("질문0", "답변")
+    conversation.add("질문1", "답변")
+    try:
+        assert conversation.messages() == [HumanMessage(content="질문1"), AIMessage(content="답변")]
+    finally:
+        release.set()
+        wait(conversation)
+    assert conversation.summary == "질문0"
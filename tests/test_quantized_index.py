@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+import quantized_index
+from quantized_index import LatestIndex, build
+
+
+class FakeCollection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get(self, include):
+        return {
+            "ids": [f"id-{i}" for i in range(len(self.rows))],
+            "documents": [text for text, _ in self.rows],
+            "metadatas": [{"source": text} for text, _ in self.rows],
+            "embeddings": [vector for _, vector in self.rows],
+        }
+
+
+def test_search_rescores_with_full_vectors(tmp_path):
+    index = build(FakeCollection([("a", [1.0, 0.0, 0.0]), ("b", [0.0, 1.0, 0.0]), ("c", [0.7, 0.7, 0.0])]),
+                  path=str(tmp_path), dimensions=2, dtype="int8", rescore=3)
+    result = index.query([[1.0, 0.1, 0.0]], n_results=2)
+    assert result["documents"][0] == ["a", "c"]
+    assert index.query([[1.0, 0.1, 0.0]], n_results=2, where={"source": {"$in": ["b"]}})["documents"][0] == ["b"]
+
+
+def test_latest_index_reloads_after_rebuild(tmp_path):
+    path = str(tmp_path)
+    build(FakeCollection([("old", [1.0, 0.0])]), path=path, dtype="float16")
+    backend = LatestIndex(path)
+    first = backend.current()
+    assert backend.query([[1.0, 0.0]], n_results=1)["documents"][0] == ["old"]
+    assert backend.current() is first
+
+    build(FakeCollection([("new", [1.0, 0.0]), ("other", [0.0, 1.0])]), path=path, dtype="float16")
+    meta = os.path.join(path, "meta.json")
+    stat = os.stat(meta)
+    os.utime(meta, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # 같은 시각에 다시 쓴 경우 대비
+    assert backend.query([[1.0, 0.0]], n_results=1)["documents"][0] == ["new"]
+    assert len(backend.current().ids) == 2
+    assert quantized_index.load_index(path) is backend.current()
+    assert np.asarray(backend.current().full).shape == (2, 2)
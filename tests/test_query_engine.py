@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+from langchain_core.messages import AIMessage
+
+from query_engine import QueryError, QuerySpec, answer_context, execute
+
+
+@pytest.fixture
+def tables():
+    fixtures = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-08-18", "2024-08-24", "2024-08-31", "2024-09-14"]),
+        "Opponent": ["Chelsea", "Ipswich Town", "West Ham", "Brentford"],
+        "Venue": ["Away", "Home", "Away", "Home"],
+        "Result": ["W", "W", "W", "W"],
+        "GF": [2.0, 4.0, 3.0, 2.0],
+        "xG": [1.5, 3.2, 2.4, 2.6],
+    })
+    shooting = pd.DataFrame({
+        "Date": fixtures["Date"],
+        "Opponent": fixtures["Opponent"],
+        "Sh": [18.0, 25.0, 14.0, 20.0],
+    })
+    players = pd.DataFrame({"Player": ["Erling Haaland"], "Gls": [27.0]})
+    return {"mancity_scores_fixtures": fixtures, "mancity_shooting": shooting, "Standard Stats": players}
+
+
+def run(tables, **spec):
+    return execute(QuerySpec(table="mancity_scores_fixtures", **spec), tables)
+
+
+def test_filter_sort_and_limit(tables):
+    result = run(tables, filters=[{"column": "Venue", "op": "==", "value": "Home"}],
+                 columns=["GF"], sort_by="GF", ascending=False, limit=1)
+    assert result.to_dict("records") == [
+        {"Date": pd.Timestamp("2024-08-24"), "Opponent": "Ipswich Town", "GF": 4.0}
+    ]
+
+
+def test_date_and_list_filters(tables):
+    result = run(tables, filters=[
+        {"column": "Date", "op": ">=", "value": "2024-08-24"},
+        {"column": "Opponent", "op": "in", "value": ["West Ham", "Chelsea", "Brentford"]},
+    ])
+    assert result["Opponent"].tolist() == ["West Ham", "Brentford"]
+
+
+def test_numeric_string_filter_is_coerced(tables):
+    result = run(tables, filters=[{"column": "GF", "op": ">", "value": "2"}])
+    assert result["Opponent"].tolist() == ["Ipswich Town", "West Ham"]
+
+
+def test_non_numeric_string_for_numeric_column_is_rejected(tables):
+    with pytest.raises(QueryError):
+        run(tables, filters=[{"column": "GF", "op": ">", "value": "many"}])
+
+
+def test_join_on_match_keys(tables):
+    result = run(tables, join=["mancity_shooting"], columns=["GF", "Sh"], sort_by="Sh", limit=2)
+    assert result["Opponent"].tolist() == ["Ipswich Town", "Brentford"]
+    assert result["Sh"].tolist() == [25.0, 20.0]
+
+
+def test_join_with_different_keys_is_rejected(tables):
+    with pytest.raises(QueryError):
+        run(tables, join=["Standard Stats"])
+
+
+def test_group_by_metrics(tables):
+    result = run(tables, group_by=["Venue"], metrics=[{"column": "xG", "agg": "mean"}, {"column": "GF", "agg": "sum"}],
+                 sort_by="sum(GF)", ascending=True)
+    assert result.to_dict("records") == [
+        {"Venue": "Away", "rows": 2, "mean(xG)": pytest.approx(1.95), "sum(GF)": 5.0},
+        {"Venue": "Home", "rows": 2, "mean(xG)": pytest.approx(2.9), "sum(GF)": 6.0},
+    ]
+
+
+def test_unknown_column_is_rejected(tables):
+    with pytest.raises(QueryError):
+        run(tables, columns=["Poss"])
+
+
+class FakePlanner:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+
+    def invoke(self, prompt):
+        if self.error is not None:
+            raise self.error
+        return AIMessage(content=self.reply)
+
+
+def test_answer_context_runs_planned_query(tables):
+    planner = FakePlanner('{"table": "mancity_scores_fixtures", "metrics": [{"column": "GF", "agg": "sum"}]}')
+    context = answer_context("총 득점", planner, tables)
+    assert context.startswith("[정형 질의 결과: mancity_scores_fixtures]")
+    assert "11" in context
+
+
+@pytest.mark.parametrize("planner", [
+    FakePlanner(error=ConnectionError("rate limited")),
+    FakePlanner('[{"table": "mancity_scores_fixtures"}, {"table": "mancity_shooting"}]'),
+    FakePlanner('["mancity_scores_fixtures"]'),
+    FakePlanner('{"table": null}'),
+    FakePlanner('{"table": "mancity_scores_fixtures", "columns": ["Poss"]}'),
+])
+def test_answer_context_falls_back_to_retrieval(planner, tables):
+    assert answer_context("평균 점유율", planner, tables) is None
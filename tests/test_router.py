@@ -0,0 +1,60 @@
+import pytest
+
+from entities import EntityExtractor
+from router import route
+
+
+@pytest.fixture
+def extractor():
+    return EntityExtractor({"Opponent": {"Arsenal", "Manchester Utd"}, "Player": {"Erling Haaland"}})
+
+
+@pytest.mark.parametrize("question", [
+    "이번 시즌 평균 xG가 뭐야?",
+    "xG가 가장 높은 경기는 뭐야?",
+    "What is our average xG?",
+    "Cmp% 가장 높은 선수는?",
+    "점유율 60% 이상인 경기는?",
+])
+def test_aggregate_question_with_term_is_structured(question, extractor):
+    assert route(question, extractor=extractor).route == "structured"
+
+
+@pytest.mark.parametrize("question", [
+    "최근 5경기 xG 추이가 뭐야?",
+    "아스널전 xG가 뭐야?",
+    "하이프레스 분석해줘",
+    "하이프레싱 성공률은?",
+])
+def test_data_question_is_not_answered_locally(question, extractor):
+    decision = route(question, extractor=extractor)
+    assert decision.route in ("rag", "structured")
+    assert decision.answer is None
+
+
+@pytest.mark.parametrize("question", [
+    "PSxG 뜻이 뭐야?",
+    "psxg가 뭐야?",
+    "PSxG란?",
+    "PSxG는 무슨 뜻이에요?",
+    "PSxG+/- 설명해줘",
+    "What is PSxG?",
+    "What does xAG mean?",
+    "Cmp% 뜻이 뭐야?",
+    "SoT% 가 뭐야?",
+    "Save% 뜻",
+])
+def test_term_definition_is_legend(question, extractor):
+    decision = route(question, extractor=extractor)
+    assert decision.route == "legend"
+    assert decision.answer.startswith("**")
+
+
+@pytest.mark.parametrize("question", ["안녕", "안녕하세요!", "하이", "hi", "ㅋㅋㅋ", "고마워요", "thanks!"])
+def test_greeting_is_smalltalk(question, extractor):
+    assert route(question, extractor=extractor).route == "smalltalk"
+
+
+def test_vague_request_without_history_asks_back(extractor):
+    assert route("분석해줘", extractor=extractor).route == "clarify"
+    assert route("분석해줘", has_history=True, extractor=extractor).route == "rag"
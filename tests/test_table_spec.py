@@ -0,0 +1,99 @@
+import json
+
+import pandas as pd
+import pytest
+
+from table_spec import SpecSplitter, render, to_markdown
+
+SPEC = {
+    "table": "mancity_scores_fixtures",
+    "filters": [{"column": "Opponent", "op": "==", "value": "Arsenal"}],
+    "columns": ["Result", "xG"],
+}
+SPEC_LINE = "TABLE: " + json.dumps(SPEC)
+
+
+@pytest.fixture
+def tables():
+    fixtures = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-09-22", "2025-02-02", "2024-10-05"]),
+        "Opponent": ["Arsenal", "Arsenal", "Fulham"],
+        "Result": ["D", "L", "W"],
+        "xG": [1.234, 0.5, 2.0],
+    })
+    return {"mancity_scores_fixtures": fixtures}
+
+
+def stream(splitter, pieces):
+    out = []
+    for piece in pieces:
+        out += splitter.feed(piece)
+    return out + splitter.close()
+
+
+def test_to_markdown_rounds_and_escapes():
+    frame = pd.DataFrame({"Name": ["a|b", None], "xG": [1.234, 2.0]})
+    assert to_markdown(frame).splitlines() == ["| Name | xG |", "|---|---|", "| a\\|b | 1.23 |", "|  | 2 |"]
+
+
+def test_spec_line_is_rendered_as_table(tables):
+    splitter = SpecSplitter(tables)
+    out = stream(splitter, [SPEC_LINE + "\n", "아스널전 두 경기는 ", "모두 이기지 못했다."])
+
+    assert out[0].startswith("| Date | Opponent | Result | xG |")
+    assert out[0].count("Arsenal") == 2 and "Fulham" not in out[0]
+    assert out[0].endswith("\n\n")
+    assert "".join(out[1:]) == "아스널전 두 경기는 모두 이기지 못했다."
+    assert splitter.spec.table == "mancity_scores_fixtures"
+    assert splitter.table == out[0].strip()
+
+
+def test_spec_split_across_pieces(tables):
+    pieces = [" TAB", "LE: ", SPEC_LINE[7:20], SPEC_LINE[20:], "\n\n해석"]
+    splitter = SpecSplitter(tables)
+    out = []
+    for piece in pieces[:-1]:
+        out += splitter.feed(piece)
+    assert out == []  # 첫 줄이 끝날 때까지 기다린다
+    out += splitter.feed(pieces[-1]) + splitter.close()
+    assert out[0].startswith("| Date |") and out[1:] == ["해석"]
+
+
+def test_answer_without_spec_passes_through(tables):
+    splitter = SpecSplitter(tables)
+    assert splitter.feed("아스널") == ["아스널"]
+    assert splitter.feed("전은\n무승부") == ["전은\n무승부"]
+    assert splitter.close() == []
+    assert splitter.spec is None and splitter.table is None
+
+
+def test_short_prefix_that_is_not_a_spec_is_released_on_close(tables):
+    splitter = SpecSplitter(tables)
+    assert splitter.feed("T") == []
+    assert splitter.close() == ["T"]
+
+
+@pytest.mark.parametrize("line", ["TABLE: null", "TABLE:", "TABLE: {not json", 'TABLE: {"table": "missing"}'])
+def test_null_or_invalid_spec_is_dropped(tables, line):
+    splitter = SpecSplitter(tables)
+    assert stream(splitter, [line + "\n", "해석만"]) == ["해석만"]
+    assert splitter.table is None
+
+
+def test_empty_result_keeps_spec_without_table(tables):
+    spec = dict(SPEC, filters=[{"column": "Opponent", "op": "==", "value": "Chelsea"}])
+    assert render("TABLE: " + json.dumps(spec), tables)[1] is None
+    assert render("TABLE: " + json.dumps(spec), tables)[0].table == "mancity_scores_fixtures"
+
+
+def test_close_with_only_spec_line(tables):
+    splitter = SpecSplitter(tables)
+    assert splitter.feed(SPEC_LINE) == []
+    out = splitter.close()
+    assert len(out) == 1 and out[0].startswith("| Date |")
+
+
+def test_max_rows_caps_limit(tables):
+    spec, table = render(SPEC_LINE, tables, max_rows=1)
+    assert spec.limit == 1
+    assert len(table.splitlines()) == 3
@@ -0,0 +1,39 @@
+import functools
+import logging
+
+import tiktoken
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # 인코딩 파일을 받을 수 없는 환경(오프라인 등)에서는 근사치로 센다
+        logger.warning("tiktoken encoding unavailable (%s), using approximate token counts", e)
+        return None
+
+
+def count_tokens(text, model=config.EMBEDDING_MODEL):
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text.encode("utf-8")) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens, model=config.EMBEDDING_MODEL):
+    """앞에서부터 max_tokens 토큰까지만 남긴다."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text.encode("utf-8")[:(max_tokens - 1) * 3].decode("utf-8", errors="ignore")
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,60 @@
+"""채팅 턴별 추적 기록 (단계별 소요 시간, 문맥/프롬프트/답변 크기).
+
+pipeline.ChatTurn의 단계별 시간과 문맥/토큰 수를 한 건의 dict로 만들어 JSON Lines 파일에
+추가한다 (여러 프로세스가 같은 파일에 써도 한 줄씩 append 된다).
+
+    {"time": "...", "question": "...", "cached": false, "route": "retrieval",
+     "router": {"route": "rag", "reason": "default"},
+     "spans_ms": {"embedding": 0.3, "retrieval": 14.9, ..., "first_token": 301.2, "total": 860.6},
+     "context_documents": 30, "context_chars": 8123, "context_tokens": 2845,
+     "prompt_tokens": 3610, "completion_tokens": 412}
+"""
+import json
+import os
+import threading
+import time
+
+import config
+from tokens import count_tokens
+
+_lock = threading.Lock()
+
+
+def build_trace(turn, answer, total_seconds):
+    """ChatTurn과 최종 답변으로 추적 기록을 만든다."""
+    context = turn.context or ""
+    if turn.direct_answer is not None:
+        route = turn.decision.route
+    elif turn.cached_answer is not None:
+        route = "answer_cache"
+    elif context.startswith("[정형 질의 결과"):
+        route = "structured_query"
+    else:
+        route = "retrieval"
+    # 모델이 실제로 출력한 텍스트 기준 (표 지정 모드의 TABLE: 줄 포함, 앱이 그린 표 제외)
+    model_output = turn.model_output if turn.model_output is not None else answer
+    spans = {stage: round(seconds * 1000, 1) for stage, seconds in turn.timings.items()}
+    spans["total"] = round(total_seconds * 1000, 1)
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "question": turn.question,
+        "cached": turn.cached_answer is not None,
+        "route": route,
+        "router": {"route": turn.decision.route, "reason": turn.decision.reason} if turn.decision else None,
+        "spans_ms": spans,
+        "context_documents": turn.context_stats.get("kept", 0),
+        "context_chars": len(context),
+        "context_tokens": count_tokens(context, config.CHAT_MODEL) if context else 0,
+        "prompt_tokens": sum(count_tokens(m.content, config.CHAT_MODEL) for m in turn.messages or []),
+        "completion_tokens": count_tokens(model_output, config.CHAT_MODEL) if model_output else 0,
+        "table_rendered": turn.rendered_table is not None,
+    }
+
+
+def append_trace(record, path=config.TRACE_LOG_PATH):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line)